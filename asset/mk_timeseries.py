@@ -18,14 +18,18 @@ Functions:
 
 # %% ---- 2024-06-04 ------------------------
 # Requirements and constants
-import time
-import random
-import perlin_noise
-
+import sys
 import numpy as np
 import pandas as pd
 
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+root = Path(__file__).parent.parent
+sys.path.insert(0, str(root))
+
+from util import logger  # noqa: E402
+from util.timeseries_store import TimeSeriesStore  # noqa: E402
 
 
 # %% ---- 2024-06-04 ------------------------
@@ -34,30 +38,105 @@ class Option:
     tmax = 10  # Seconds
     tmin = 0  # Seconds
     interval = 0.01  # Seconds
-
-
-def generate_time_series(chs: int = 20):
+    chs = 20  # Channels
+    seed = 20240604  # Base seed, the channel seeds are derived from it
+    workers = 1  # Processes, 1 for generating in the current process
+    name = 'ts'  # Library name
+    write_csv = False  # Whether to write the CSV besides the binary store
+
+
+def gradient_noise(x: np.ndarray, cells: int, rng: np.random.Generator) -> np.ndarray:
+    '''
+    The 1D gradient (Perlin) noise of x in [0, 1) with the cells of lattice.
+    The whole axis is computed at once.
+    '''
+    grads = rng.uniform(-1, 1, cells + 2)
+    u = x * cells
+    i = np.floor(u).astype(np.int64)
+    f = u - i
+    n0 = grads[i] * f
+    n1 = grads[i + 1] * (f - 1)
+    fade = f * f * f * (f * (f * 6 - 15) + 10)
+    return n0 + fade * (n1 - n0)
+
+
+def generate_channel(ch: int, n: int, seed: int = Option.seed) -> np.ndarray:
+    '''Generate the channel normalized into [0, 1], it is deterministic by (seed, ch)'''
+    rng = np.random.default_rng([seed, ch])
+    octaves = int(rng.integers(20, 51))
+    ts = gradient_noise(np.arange(n) / n, octaves, rng) * 0.5 + 0.5
+    ts -= np.min(ts)
+    ts /= np.max(ts)
+    return ts.astype(np.float32)
+
+
+def _generate_channels(args):
+    chs, n, seed = args
+    return [generate_channel(ch, n, seed) for ch in chs]
+
+
+def spectral_properties(values: np.ndarray, interval: float) -> list:
+    '''
+    The spectral properties of the (n_channels, n_samples) values,
+    the frequencies are in Hz.
+    '''
+    power = np.abs(np.fft.rfft(
+        values - values.mean(axis=1, keepdims=True), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(values.shape[1], interval)
+    total = power.sum(axis=1)
+    total[total == 0] = 1
+    centroid = power @ freqs / total
+    bandwidth = np.sqrt(power @ freqs**2 / total - centroid**2)
+    edge = freqs[np.argmax(np.cumsum(power, axis=1) >= 0.95 * total[:, None], axis=1)]
+    return [
+        dict(peak=float(p), centroid=float(c), bandwidth=float(b), edge95=float(e))
+        for p, c, b, e in zip(freqs[np.argmax(power, axis=1)], centroid, bandwidth, edge)]
+
+
+def generate_time_series(chs: int = Option.chs, seed: int = Option.seed, workers: int = Option.workers):
+    '''
+    Generate the (n_channels, n_samples) time series.
+    The channels are split across the process pool if workers > 1.
+
+    Returns:
+        - values: The float32 time series.
+        - columns: The channel names.
+    '''
     times = np.arange(Option.tmin, Option.tmax, Option.interval)
     n = len(times)
-    df = pd.DataFrame()
-    for ch in range(chs):
-        name = f'p-{ch}'
-        octaves = random.randint(20, 50)
-        noise = perlin_noise.PerlinNoise(octaves=octaves, seed=time.time())
-        ts = np.array([noise(i/n) for i, times in enumerate(times)])*0.5 + 0.5
-        ts -= np.min(ts)
-        ts /= np.max(ts)
-        df[name] = ts
 
-    return df
+    if workers > 1:
+        groups = [(list(range(ch, chs, workers)), n, seed) for ch in range(workers)]
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_generate_channels, groups))
+        values = np.empty((chs, n), dtype=np.float32)
+        for (group, _, _), result in zip(groups, results):
+            values[group] = result
+    else:
+        values = np.array([generate_channel(ch, n, seed) for ch in range(chs)])
+
+    columns = [f'p-{ch}' for ch in range(chs)]
+    return values, columns
 
 
 # %% ---- 2024-06-04 ------------------------
 # Play ground
 if __name__ == "__main__":
-    df = generate_time_series()
-    path = Path(__file__).parent.joinpath('timeseries/ts.csv')
-    df.to_csv(path)
+    values, columns = generate_time_series()
+    folder = Path(__file__).parent.joinpath('timeseries')
+
+    if Option.write_csv:
+        pd.DataFrame(values.T, columns=columns).to_csv(
+            folder.joinpath(f'{Option.name}.csv'))
+
+    # The CSV is left as it was if it is not written,
+    # so the store is marked as generated, it is not reconverted from the stale CSV
+    TimeSeriesStore.write(
+        folder, Option.name, values, columns, Option.interval,
+        generated=not Option.write_csv,
+        seed=Option.seed,
+        spectra=spectral_properties(values, Option.interval))
+    logger.info(f'Generated {Option.name}: {values.shape}')
 
 
 # %% ---- 2024-06-04 ------------------------
@@ -18,16 +18,21 @@ Functions:
 
 # %% ---- 2024-06-03 ------------------------
 # Requirements and constants
-import pickle
-import plotly.express as px
+import json
+import base64
 
 from pathlib import Path
 
-from flask import Flask, Response, render_template, request
+from flask import Flask, Response, render_template, request, stream_with_context
 
 from util import logger
-from util.websocket_client import MyWebsocketClient
-from util.session_manager import SessionManager, TimeSeriesManager, txt2df
+from util.display_group import DisplayGroup
+from util.design import DesignError, check_on_screen
+from util.image_cache import image_hash
+from util.preview import build_preview
+from util.protocol import encode_message, decode_message
+from util.session_manager import SessionManager, TimeSeriesManager
+from util.status_stream import StatusBroadcaster
 
 
 # ----------------------------------------
@@ -46,10 +51,19 @@ app = Flask(
     template_folder=web.joinpath('template')
 )
 
-mwc = MyWebsocketClient()
+# The displays are set by SSVEP_DISPLAY_URLS, e.g. ws://host-a:23335,ws://host-b:23335
+group = DisplayGroup.from_env()
+# The first display serves the status
+mwc = group.nodes[0].client
+clock = group.nodes[0].clock
+# One status subscription to the display serves every browser
+broadcaster = StatusBroadcaster(mwc.url, max_rate=10, clock=clock)
 
 # %% ---- 2024-06-03 ------------------------
 # Function and class
+def convert_data_url_to_bytes(data_url: str) -> bytes:
+    s = data_url.split('base64,', 1)[-1]
+    return base64.b64decode(s.replace('\\n', ''))
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -77,7 +91,6 @@ def get_all():
 @app.route('/getByName', methods=['GET'])
 def get_by_name():
     name = request.args.get('name')
-    sm.refresh()
     content = sm.get_by_name(name)
     logger.debug(f'Got by name: {name}')
     return dict(content=content)
@@ -95,73 +108,188 @@ def get_time_series():
 def commit_temporal():
     body_length = request.form.get('trialBodyLength')
     txt = request.form.get('designText')
-    df_ts, df_corr = tsm.merge_with_txt(txt, body_length)
 
-    fig1 = px.line(
-        df_ts,
-        x='seconds',
-        y='value',
-        facet_row='type',
-        symbol='type',
-        symbol_map={'ts': 'line-ew', 'compute': 'line-ns'},
-        color='name',
-        template="seaborn")
+    # The preview is rendered by the browser from the payload of /preview/<key>
+    key = tsm.cache.make_key(
+        'preview', txt, float(body_length), tsm.get_store().version)
 
-    fig2 = px.imshow(df_corr, template="seaborn")
+    def compile():
+        merged = tsm.merge_with_txt(txt, body_length)
+        df_pairs, df_corr, _ = merged.screen()
+        return json.dumps(build_preview(merged, df_pairs, df_corr))
 
-    return render_template(
-        "time-series.html",
-        fig1=fig1.to_html(full_html=False),
-        fig2=fig2.to_html(full_html=False))
-
-
-@app.route('/go', methods=['POST'])
-def _go():
-    head_length = request.form.get('trialHeadLength')
-    body_length = request.form.get("trialBodyLength")
-    tail_length = request.form.get("trialTailLength")
-    txt = request.form.get('designText')
-    cue = request.form.get('cue')
-    repeats = request.form.get("trialRepeats")
-    resolution_x = request.form.get("resolutionX")
-    resolution_y = request.form.get("resolutionY")
-    background_image_data_url = request.form.get('backgroundImageDataUrl')
-    patch_shape = request.form.get('patchShape')
-
-    df_ts, _ = tsm.merge_with_txt(txt, body_length)
-    df_layout = txt2df(txt)
-
-    # print(df_layout)
-    # print(df_ts)
+    try:
+        tsm.cache.get_or_compute(key, compile)
+    except DesignError as error:
+        return Response(f'Invalid design:\n{error}', status=400, mimetype='text/plain')
+
+    return render_template("time-series.html", key=key)
+
+
+@app.route('/preview/<key>', methods=['GET'])
+def get_preview(key):
+    # The payload never changes for the key
+    if key in request.if_none_match:
+        return Response(status=304)
+
+    payload = tsm.cache.get(key)
+    if payload is None:
+        return dict(error=f'Preview expired: {key}'), 404
+
+    response = Response(payload, mimetype='application/json')
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = 24 * 3600
+    return response
+
+
+def compile_block(form) -> tuple:
+    '''
+    Compile the block of the form.
+
+    Returns:
+        - meta: The options of the block.
+        - arrays: The layout and the stimulus, they are sent as the raw buffers.
+        - images: The background image bytes, keyed by the hash.
+
+    Raises:
+        - DesignError: The design is invalid.
+    '''
+    head_length = form.get('trialHeadLength')
+    body_length = form.get("trialBodyLength")
+    tail_length = form.get("trialTailLength")
+    txt = form.get('designText')
+    cue = form.get('cue')
+    repeats = form.get("trialRepeats")
+    resolution_x = form.get("resolutionX")
+    resolution_y = form.get("resolutionY")
+    background_image_data_url = form.get('backgroundImageDataUrl')
+    patch_shape = form.get('patchShape')
+    render_mode = form.get('renderMode', 'palette')
+
+    # The display generates the values from the compact spec,
+    # the compiled design is shared with /commitTemporal
+    design, spec = tsm.compile_txt(txt)
+    check_on_screen(design, (int(resolution_x), int(resolution_y)))
+
+    # print(design)
     # print(cue, head_length, body_length, tail_length, repeats)
     # print(resolution_x, resolution_y)
 
-    kwargs = dict(
-        task_name='SSVEP',
-        prompt='SSVEP Experiment Prompt',
+    meta = dict(
         resolution_x=int(resolution_x),
         resolution_y=int(resolution_y),
         repeats=int(repeats),
         cue=cue,
-        df_layout=df_layout,
-        df_ts=df_ts,
         head_length=int(head_length),
         body_length=int(body_length),
         tail_length=int(tail_length),
-        background_image_data_url=background_image_data_url,
         patch_shape=patch_shape,
+        render_mode=render_mode,
+        stimulus_interval=spec.interval,
+    )
+    arrays = dict(
+        layout=design,
+        omega=spec.omega,
+        phi=spec.phi,
+        from_csv=spec.from_csv,
+        loops=spec.loops,
     )
-    # print(kwargs)
+
+    # The display caches the background image by its hash
+    images = dict()
+    if background_image_data_url:
+        image = convert_data_url_to_bytes(background_image_data_url)
+        meta['background_image_hash'] = image_hash(image)
+        images[meta['background_image_hash']] = image
+
+    return meta, arrays, images
+
+
+def send_task(meta: dict, arrays: dict, images: dict) -> dict:
+    '''
+    Send the task to every display of the group,
+    the several displays start at the same time.
+    '''
+    for node in group.nodes:
+        node.request(dict(prompt='Hello'))
+    return group.run_task(meta, arrays, images)
+
+
+def reply_task(result: dict):
+    nodes = result['nodes']
+
+    # The display rejects the task when its queue is full
+    if busy := [e for e in nodes if e.get('busy')]:
+        logger.warning(f'Display is busy: {busy}')
+        return dict(suggestion='Wait for the tasks in the display', error='Display is busy', tasksInWait=[e.get('tasksInWait') for e in busy], nodes=nodes), 503
+
+    if failed := [e for e in nodes if e.get('error')]:
+        logger.error(f'Display failed: {failed}')
+        return dict(suggestion='Check the display', error='; '.join(f'{e["url"]}: {e["error"]}' for e in failed), nodes=nodes), 500
+
+    return dict(go='go', taskId=result.get('taskId'), startAtNs=result.get('startAtNs'), nodes=nodes)
+
+
+@app.route('/go', methods=['POST'])
+def _go():
+    try:
+        meta, arrays, images = compile_block(request.form)
+    except DesignError as error:
+        logger.error(f'Invalid design: {error}')
+        return dict(suggestion='Fix the design', error=f'{error}'), 400
+
+    meta.update(task_name='SSVEP', prompt='SSVEP Experiment Prompt')
+
+    try:
+        result = send_task(meta, arrays, images)
+    except Exception as error:
+        import traceback
+        logger.error(f'Failed websocket connection: {error}')
+        return dict(suggestion='Open the display', error=f'{error}', traceback=traceback.format_exc()), 500
+
+    return reply_task(result)
+
+
+@app.route('/goBatch', methods=['POST'])
+def go_batch():
+    '''
+    Queue the blocks of the experiment in one task.
+    The body is the JSON {blocks: [...]}, every block has the fields of the /go form.
+    '''
+    blocks = (request.get_json(silent=True) or {}).get('blocks')
+    if not blocks:
+        return dict(suggestion='Add the blocks', error='Empty batch'), 400
+
+    meta = dict(task_name='SSVEPBatch',
+                prompt='SSVEP Experiment Prompt', blocks=[])
+    arrays = dict()
+    images = dict()
+    for i, form in enumerate(blocks):
+        try:
+            m, a, g = compile_block(form)
+        except DesignError as error:
+            logger.error(f'Invalid design of block {i}: {error}')
+            return dict(suggestion=f'Fix the design of block {i}', error=f'{error}'), 400
+
+        # The arrays of the ith block are named as 'i/name'
+        meta['blocks'].append(m)
+        arrays.update({f'{i}/{k}': v for k, v in a.items()})
+        images.update(g)
 
     try:
-        mwc.send(pickle.dumps(dict(prompt='Hello')))
-        mwc.send(pickle.dumps(kwargs))
+        result = send_task(meta, arrays, images)
     except Exception as error:
         import traceback
         logger.error(f'Failed websocket connection: {error}')
         return dict(suggestion='Open the display', error=f'{error}', traceback=traceback.format_exc()), 500
 
-    return dict(go='go')
+    return reply_task(result)
+
+
+@app.route('/compileCacheStats', methods=['GET'])
+def compile_cache_stats():
+    return tsm.cache.stats()
 
 
 @app.route('/setUserProfile', methods=['POST'])
@@ -169,10 +297,11 @@ def userLogin():
     pkg = dict(request.form.items())
 
     try:
-        mwc.send(pickle.dumps(dict(
-            task_name='setUserProfile',
-            profile=pkg
-        )))
+        for node in group.nodes:
+            node.request(dict(
+                task_name='setUserProfile',
+                profile=pkg
+            ))
     except Exception as error:
         import traceback
         logger.error(f'Failed websocket connection: {error}')
@@ -184,10 +313,13 @@ def userLogin():
 @app.route('/checkoutDisplayStatus', methods=['GET'])
 def checkout_display_status():
     try:
-        got = mwc.send(pickle.dumps(dict(
+        # The new events since the seq or the display perf_counter_ns
+        got = mwc.send(encode_message(dict(
             task_name='checkoutDisplayStatus',
+            sinceEvent=request.args.get('sinceEvent', type=int),
+            sinceTime=request.args.get('sinceTime', type=int),
         )))
-        msg = pickle.loads(got)
+        msg = clock.annotate(decode_message(got)[0])
         logger.debug(
             f'Checkout display status: {list(msg)} ({len(got)} bytes)')
         return msg
@@ -197,6 +329,20 @@ def checkout_display_status():
         return dict(suggestion='Open the display', error=f'{error}', traceback=traceback.format_exc()), 500
 
 
+@app.route('/clockSync', methods=['GET'])
+def clock_sync():
+    return {node.url: node.clock.estimate() for node in group.nodes}
+
+
+@app.route('/displayStatusStream', methods=['GET'])
+def display_status_stream():
+    response = Response(
+        stream_with_context(broadcaster.stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # %% ---- 2024-06-03 ------------------------
 # Play ground
 if __name__ == "__main__":
@@ -18,6 +18,8 @@ Functions:
 
 # %% ---- 2024-06-06 ------------------------
 # Requirements and constants
+import sys
+
 from util import logger
 from util.display import MainWindow
 
@@ -29,7 +31,9 @@ from util.display import MainWindow
 # %% ---- 2024-06-06 ------------------------
 # Play ground
 if __name__ == "__main__":
-    mw = MainWindow()
+    # python start-display.py [port]
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    mw = MainWindow(port=port)
     mw.main_loop()
 
 
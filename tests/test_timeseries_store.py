@@ -0,0 +1,82 @@
+"""
+File: test_timeseries_store.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Test the generated time series store is not overwritten by the stale CSV
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from util.timeseries_store import TimeSeriesStore  # noqa: E402
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def write_csv(root: Path, values: np.ndarray, columns: list):
+    pd.DataFrame(values.T, columns=columns).to_csv(root.joinpath('ts.csv'))
+
+
+def test_generated_store_survives_touched_csv(tmp_path):
+    # The CSV of the previous library
+    write_csv(tmp_path, np.zeros((2, 10), dtype=np.float32), ['p-0', 'p-1'])
+
+    # The generated library, the CSV is not written (like mk_timeseries)
+    generated = np.random.default_rng(0).random((3, 20)).astype(np.float32)
+    TimeSeriesStore.write(
+        tmp_path, 'ts', generated, ['p-0', 'p-1', 'p-2'], generated=True)
+
+    st = tmp_path.joinpath('ts.csv').stat()
+    os.utime(tmp_path.joinpath('ts.csv'),
+             ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    store = TimeSeriesStore(tmp_path).open()
+    assert store.columns == ['p-0', 'p-1', 'p-2']
+    np.testing.assert_array_equal(np.asarray(store.values), generated)
+
+
+def test_converted_store_follows_csv(tmp_path):
+    write_csv(tmp_path, np.zeros((2, 10), dtype=np.float32), ['p-0', 'p-1'])
+    store = TimeSeriesStore(tmp_path).open()
+    assert store.columns == ['p-0', 'p-1']
+
+    values = np.ones((3, 10), dtype=np.float32)
+    write_csv(tmp_path, values, ['a', 'b', 'c'])
+    st = tmp_path.joinpath('ts.csv').stat()
+    os.utime(tmp_path.joinpath('ts.csv'),
+             ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    store = TimeSeriesStore(tmp_path).open()
+    assert store.columns == ['a', 'b', 'c']
+    np.testing.assert_array_equal(np.asarray(store.values), values)
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
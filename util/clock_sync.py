@@ -0,0 +1,179 @@
+"""
+File: clock_sync.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Synchronize the display clock to the server clock
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import time
+import numpy as np
+
+from collections import deque
+from threading import Thread, RLock
+
+from . import logger
+from .protocol import encode_message, decode_message
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+class ClockSync(object):
+    '''
+    The NTP-style estimator of the display clock.
+
+    The server clock is time.time_ns(), the display clock is its perf_counter_ns().
+    Every ping is the exchange of the four timestamps,
+        t0: server sends, t1: display receives, t2: display replies, t3: server receives.
+    The round trip time is (t3 - t0) - (t2 - t1),
+    and the offset (display - server) is ((t1 - t0) + (t2 - t3)) / 2.
+
+    Only the pings of the smallest rtt are trusted (min-RTT filtering),
+    the offset and the drift are the linear fit of them along the display clock.
+    The uncertainty is half of the smallest rtt plus the residual of the fit.
+    '''
+    interval = 2  # Seconds between the pings
+    window = 64  # Pings in the estimation
+    quantile = 0.25  # The fraction of the pings with the smallest rtt
+
+    def __init__(self, client, interval: float = None):
+        self.client = client
+        if interval:
+            self.interval = interval
+        self.samples = deque(maxlen=self.window)
+        self.lock = RLock()
+        # offset = offset_ref + a + b * (t_display - t_ref),
+        # the large offset_ref is kept in int for the precision
+        self.offset_ref = None
+        self.model = None
+
+    def ping(self):
+        '''Exchange the timestamps with the display once'''
+        t0 = time.time_ns()
+        got, _, _ = decode_message(self.client.send(
+            encode_message(dict(task_name='clockPing', t0=t0))))
+        t3 = time.time_ns()
+        t1, t2 = got['t1'], got['t2']
+
+        rtt = (t3 - t0) - (t2 - t1)
+        offset = ((t1 - t0) + (t2 - t3)) // 2
+        with self.lock:
+            if self.offset_ref is None:
+                self.offset_ref = offset
+            self.samples.append((t2, offset - self.offset_ref, rtt))
+            self._fit()
+        return offset, rtt
+
+    def _fit(self):
+        samples = np.array(self.samples, dtype=np.float64)
+        rtt = samples[:, 2]
+        n = max(2, int(np.ceil(len(samples) * self.quantile)))
+        best = samples[np.argsort(rtt)[:n]]
+
+        t_ref = samples[-1, 0]
+        x = best[:, 0] - t_ref
+        y = best[:, 1]
+        # The drift needs the pings across the time
+        if len(best) > 2 and np.ptp(x) > 0:
+            b, a = np.polyfit(x, y, 1)
+        else:
+            a, b = y.mean(), 0.0
+        residual = y - (a + b * x)
+
+        self.model = dict(
+            t_ref=t_ref, a=a, b=b,
+            uncertainty=rtt.min() / 2 + (np.abs(residual).max() if len(residual) else 0))
+
+    def to_server(self, t_display_ns: int):
+        '''
+        Convert the display perf_counter_ns into the server time.time_ns.
+
+        Returns:
+            - t_server_ns: The server time, None if not synchronized.
+            - uncertainty_ns: The estimated uncertainty, None if not synchronized.
+        '''
+        with self.lock:
+            model = self.model
+        if model is None:
+            return None, None
+        offset = model['a'] + model['b'] * (t_display_ns - model['t_ref'])
+        return int(t_display_ns - self.offset_ref - offset), int(model['uncertainty'])
+
+    def to_display(self, t_server_ns: int):
+        '''
+        Convert the server time.time_ns into the display perf_counter_ns.
+
+        Returns:
+            - t_display_ns: The display time, None if not synchronized.
+        '''
+        with self.lock:
+            model = self.model
+        if model is None:
+            return None
+        # The offset is evaluated at the approximate display time
+        t = t_server_ns + self.offset_ref + model['a']
+        offset = model['a'] + model['b'] * (t - model['t_ref'])
+        return int(t_server_ns + self.offset_ref + offset)
+
+    def estimate(self) -> dict:
+        with self.lock:
+            model = self.model
+            samples = list(self.samples)
+        if model is None:
+            return dict(synchronized=False, samples=len(samples))
+        return dict(
+            synchronized=True,
+            samples=len(samples),
+            offsetNs=int(self.offset_ref + model['a']),
+            driftPpm=float(model['b'] * 1e6),
+            uncertaintyNs=int(model['uncertainty']),
+            minRttNs=int(min(e[2] for e in samples)),
+        )
+
+    def annotate(self, msg: dict) -> dict:
+        '''
+        Annotate the status and its events with the server time,
+        the display time is the t_ns.
+        '''
+        if (t_ns := msg.get('t_ns')) is not None:
+            msg['serverTimeNs'], msg['clockUncertaintyNs'] = self.to_server(
+                t_ns)
+        for e in msg.get('events', []):
+            e['server_t_ns'], e['uncertainty_ns'] = self.to_server(e['t_ns'])
+        return msg
+
+    def start(self):
+        Thread(target=self._run, daemon=True).start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                self.ping()
+            except Exception as error:
+                logger.debug(f'Failed to ping the display clock: {error}')
+            time.sleep(self.interval)
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
@@ -0,0 +1,123 @@
+"""
+File: compile_cache.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Content-hashed cache of the compiled designs
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import sys
+import hashlib
+import numpy as np
+import pandas as pd
+
+from threading import RLock
+from collections import OrderedDict
+
+from . import logger
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def sizeof(obj) -> int:
+    '''Estimate the memory of the obj, the arrays dominate'''
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(obj.memory_usage(deep=False).sum())
+    if isinstance(obj, dict):
+        return sum(sizeof(e) for e in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(sizeof(e) for e in obj)
+    if hasattr(obj, '__dict__'):
+        return sizeof(vars(obj))
+    return sys.getsizeof(obj)
+
+
+class CompileCache(object):
+    '''
+    The LRU cache of the compiled results.
+
+    The key is the hash of the contents, e.g. (design text, body length, library version).
+    The entries are evicted when the total size exceeds the max_bytes.
+    '''
+    max_bytes = 256 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = None):
+        if max_bytes:
+            self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = RLock()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        h = hashlib.sha1()
+        for e in parts:
+            h.update(str(e).encode())
+            h.update(b'\x00')
+        return h.hexdigest()
+
+    def get(self, key: str):
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key][0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value):
+        size = sizeof(value)
+        with self.lock:
+            if key in self.items:
+                self.nbytes -= self.items.pop(key)[1]
+            self.items[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and len(self.items) > 1:
+                _, (_, s) = self.items.popitem(last=False)
+                self.nbytes -= s
+        return value
+
+    def get_or_compute(self, key: str, compute):
+        '''
+        Get the value of the key,
+        it is computed by compute() and cached on miss.
+        '''
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+            logger.debug(f'Compiled {key[:8]}, {self.stats()}')
+        return value
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(
+                hits=self.hits, misses=self.misses,
+                entries=len(self.items), nbytes=self.nbytes, maxBytes=self.max_bytes)
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
@@ -0,0 +1,144 @@
+"""
+File: correlation.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Screen the crosstalk between the SSVEP patches
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import numpy as np
+import pandas as pd
+
+from . import logger
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def _normalize_columns(mat: np.ndarray) -> np.ndarray:
+    '''Scale the columns into unit L2 norm, the all-zero columns are kept'''
+    norm = np.linalg.norm(mat, axis=0)
+    norm[norm == 0] = 1
+    return mat / norm
+
+
+class PatchCorrelation(object):
+    '''
+    The blocked correlation engine of the (n_samples, n_patches) time series.
+
+    The columns are centered and normalized once in float32,
+    the correlation of a block of patches against all the patches is the normalized dot products.
+    The spectral overlap is the cosine similarity of the magnitude spectra,
+    it is computed in the same pass.
+    '''
+    block_size = 256  # Patches in a block
+    dense_limit = 1000  # Largest n_patches of the dense matrix
+
+    def __init__(self, values: np.ndarray, names: list, block_size: int = None):
+        if block_size:
+            self.block_size = block_size
+
+        values = np.asarray(values, dtype=np.float32)
+        centered = values - values.mean(axis=0, dtype=np.float32)
+        self.z = _normalize_columns(centered).astype(np.float32)
+        self.spectra = _normalize_columns(
+            np.abs(np.fft.rfft(centered, axis=0))).astype(np.float32)
+        self.names = list(names)
+        self.n_patches = len(self.names)
+
+    def blocks(self):
+        '''
+        Yield the (start, corr, spectral) of the blocks,
+        the corr and spectral are the (block_size, n_patches) matrices.
+        '''
+        for start in range(0, self.n_patches, self.block_size):
+            stop = min(start + self.block_size, self.n_patches)
+            corr = np.abs(self.z[:, start:stop].T @ self.z)
+            spectral = self.spectra[:, start:stop].T @ self.spectra
+            yield start, corr, spectral
+
+    def run(self, top_k: int = 5, dense: bool = None):
+        '''
+        Screen the patches in one pass.
+
+        Args:
+            - top_k: How many most-correlated patches are reported for every patch.
+            - dense: Whether to keep the dense matrices, default is by the dense_limit.
+
+        Returns:
+            - df_pairs: The top-k pairs with the columns of name, other, corr and spectral.
+            - df_corr: The dense absolute correlation, None if not dense.
+            - df_spectral: The dense spectral overlap, None if not dense.
+        '''
+        if dense is None:
+            dense = self.n_patches <= self.dense_limit
+        top_k = min(top_k, self.n_patches - 1)
+
+        dense_corr = np.empty(
+            (self.n_patches, self.n_patches), dtype=np.float32) if dense else None
+        dense_spectral = np.empty_like(dense_corr) if dense else None
+
+        pairs = []
+        for start, corr, spectral in self.blocks():
+            stop = start + len(corr)
+            if dense:
+                dense_corr[start:stop] = corr
+                dense_spectral[start:stop] = spectral
+
+            if top_k < 1:
+                continue
+
+            # Ignore the patch itself
+            rows = np.arange(len(corr))
+            corr[rows, rows + start] = -1
+            idx = np.argpartition(-corr, top_k - 1, axis=1)[:, :top_k]
+            top = np.take_along_axis(corr, idx, axis=1)
+            order = np.argsort(-top, axis=1)
+            idx = np.take_along_axis(idx, order, axis=1)
+            pairs.append((
+                np.repeat(np.arange(start, stop), top_k),
+                idx.ravel(),
+                np.take_along_axis(corr, idx, axis=1).ravel(),
+                np.take_along_axis(spectral, idx, axis=1).ravel()))
+
+        names = np.array(self.names, dtype=object)
+        if pairs:
+            i, j, c, s = [np.concatenate(e) for e in zip(*pairs)]
+        else:
+            i = j = np.zeros(0, dtype=int)
+            c = s = np.zeros(0, dtype=np.float32)
+        df_pairs = pd.DataFrame(dict(
+            name=names[i], other=names[j], corr=c, spectral=s))
+
+        df_corr = df_spectral = None
+        if dense:
+            df_corr = pd.DataFrame(dense_corr, columns=self.names, index=self.names)
+            df_spectral = pd.DataFrame(
+                dense_spectral, columns=self.names, index=self.names)
+
+        logger.debug(
+            f'Screened {self.n_patches} patches, {len(df_pairs)} pairs, dense: {dense}')
+        return df_pairs, df_corr, df_spectral
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
@@ -0,0 +1,186 @@
+"""
+File: design.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Parse and serialize the SSVEP design
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import numpy as np
+
+from io import BytesIO
+
+from . import logger
+
+COLUMNS = ['i', 'name', 'x', "y", "w", "h", 'omega', 'phi']
+FLOAT_COLUMNS = ['x', "y", "w", "h", 'omega', 'phi']
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+class DesignError(ValueError):
+    '''
+    The design is invalid.
+    The errors are the (row, column, message) of every invalid cell,
+    the row or the column is None for the error of the whole row or table.
+    '''
+
+    @staticmethod
+    def format(row, column, message: str) -> str:
+        where = ', '.join(
+            e for e in [row is not None and f'Row {row}', column is not None and f'column {column}'] if e)
+        return f'{where[:1].upper()}{where[1:]}: {message}' if where else message
+
+    def __init__(self, errors: list):
+        self.errors = errors
+        lines = [self.format(r, c, m) for r, c, m in errors[:10]]
+        if len(errors) > 10:
+            lines.append(f'... {len(errors) - 10} more errors')
+        super().__init__('\n'.join(lines))
+
+
+def design_dtype(name_length: int = 16) -> np.dtype:
+    return np.dtype(
+        [('i', np.int32), ('name', f'U{name_length}')] +
+        [(k, np.float64) for k in FLOAT_COLUMNS])
+
+
+def _to_float(column: str, cells: tuple, errors: list) -> np.ndarray:
+    try:
+        return np.array(cells, dtype=np.float64)
+    except ValueError:
+        # Locate the invalid cells only on failure
+        for r, e in enumerate(cells):
+            try:
+                float(e)
+            except ValueError:
+                errors.append((r, column, f'Invalid number "{e.strip()}"'))
+        return np.zeros(len(cells))
+
+
+def parse_design(txt: str, resolution: tuple = None) -> np.ndarray:
+    '''
+    Parse the design text into the structured array.
+
+    The rows are separated by ";" and the cells by ",",
+    the columns are i, name, x, y, w, h, omega and phi.
+
+    Args:
+        - txt: The design text.
+        - resolution: The (width, height) of the screen, the off-screen patches are rejected if provided.
+
+    Returns:
+        - design: The structured array of the design_dtype.
+
+    Raises:
+        - DesignError: The design is invalid.
+    '''
+    rows = [e.split(',') for e in txt.split(';') if e.strip()]
+
+    errors = [
+        (r, None, f'Expect {len(COLUMNS)} columns, got {len(e)}')
+        for r, e in enumerate(rows) if len(e) != len(COLUMNS)]
+    if errors:
+        raise DesignError(errors)
+    if not rows:
+        raise DesignError([(None, None, 'Empty design')])
+
+    cells = dict(zip(COLUMNS, zip(*rows)))
+    values = {k: _to_float(k, cells[k], errors) for k in ['i'] + FLOAT_COLUMNS}
+    if errors:
+        raise DesignError(errors)
+    names = np.char.strip(np.array(cells['name'], dtype=str))
+
+    # Check the cells
+    for r in np.flatnonzero(values['i'] != np.round(values['i'])):
+        errors.append((int(r), 'i', f'Invalid index {values["i"][r]}'))
+
+    for r in np.flatnonzero(names == ''):
+        errors.append((int(r), 'name', 'Empty name'))
+
+    _, inverse, counts = np.unique(
+        names, return_inverse=True, return_counts=True)
+    for r in np.flatnonzero(counts[inverse] > 1):
+        errors.append((int(r), 'name', f'Duplicate name "{names[r]}"'))
+
+    for k in ['w', 'h']:
+        for r in np.flatnonzero(~(values[k] > 0)):
+            errors.append((int(r), k, f'Invalid size {values[k][r]}'))
+
+    if errors:
+        raise DesignError(errors)
+
+    design = np.empty(len(rows), dtype=design_dtype(
+        max(1, max(len(e) for e in names))))
+    design['name'] = names
+    for k, v in values.items():
+        design[k] = v
+
+    if resolution is not None:
+        check_on_screen(design, resolution)
+
+    logger.debug(f'Parsed design: {len(design)} patches')
+    return design
+
+
+def check_on_screen(design, resolution: tuple):
+    '''
+    Reject the patches off the (width, height) screen.
+
+    Raises:
+        - DesignError: Some patches are off the screen.
+    '''
+    width, height = resolution
+    x, y, w, h = [np.asarray(design[k]) for k in ['x', 'y', 'w', 'h']]
+    off_screen = (x - w/2 < 0) | (x + w/2 > width) | (y - h/2 < 0) | (y + h/2 > height)
+    names = np.asarray(design['name'])
+    errors = [
+        (int(r), None, f'Patch "{names[r]}" is off the {width}x{height} screen')
+        for r in np.flatnonzero(off_screen)]
+    if errors:
+        raise DesignError(errors)
+
+
+def format_design(design: np.ndarray) -> str:
+    '''Serialize the design into the text'''
+    columns = [map(str, design[k].tolist()) for k in COLUMNS]
+    return ';\n'.join(','.join(e) for e in zip(*columns))
+
+
+def dumps_design(design: np.ndarray) -> bytes:
+    '''Serialize the design into the compact binary (.npy) format'''
+    buf = BytesIO()
+    np.save(buf, design, allow_pickle=False)
+    return buf.getvalue()
+
+
+def loads_design(data: bytes) -> np.ndarray:
+    '''Load the design from the compact binary (.npy) format'''
+    design = np.load(BytesIO(data), allow_pickle=False)
+    assert design.dtype.names == tuple(COLUMNS), \
+        f'Invalid design fields: {design.dtype.names}'
+    return design
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
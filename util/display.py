@@ -18,24 +18,27 @@ Functions:
 
 # %% ---- 2024-06-05 ------------------------
 # Requirements and constants
-import base64
-from io import BytesIO
 import time
 import random
 import numpy as np
 
-from enum import Enum
-from threading import Thread
+from collections import deque
+
 from PIL import Image, ImageDraw
 
 from psychopy import visual, core, event
 from psychopy.hardware import keyboard
 
-import pickle
-import websockets
-import websockets.sync.server
-
 from . import logger
+from .display_server import AvailableCurrentTasks, MyWebsocketServer
+from .event_recorder import events_to_dicts
+from .frame_clock import FrameClock, measure_frame_interval
+from .frame_profiler import DRAW, UPLOAD, FLIP
+from .marker import MarkerPublisher
+from .native_patches import NativePatches
+from .patch_renderer import PaletteRenderer
+from .texture_upload import TextureUploader
+from .stimulus import LuminanceTable, StimulusSpec, StreamingLuminance, float2gray
 
 
 # %% ---- 2024-06-05 ------------------------
@@ -53,82 +56,10 @@ def color_by_float(t):
     return '#' + ''.join(hex(e).replace('x', '')[-2:] for e in rgb)
 
 
-def convert_data_url_to_img(data_url):
-    s = data_url.split('base64,', 1)[-1]
-    decoded_bytes = base64.b64decode(s.replace('\\n', ''))
-    img = Image.open(BytesIO(decoded_bytes))
-    logger.debug(f'Converted {data_url[:20]} to {img}')
-    return img
-
-
 def gray2rgb(gray: int):
     return (gray, gray, gray)
 
 
-class AvailableCurrentTasks(Enum):
-    IDLE = 1
-    SSVEP = 2
-
-
-class MyWebsocketServer(object):
-    host = 'localhost'
-    port = 23335
-    max_size = 300000000
-
-    def __init__(self):
-        self.serve_forever()
-
-    def ws_echo(self, websocket):
-        for message in websocket:
-            logger.debug(f'Received {message[:20]}, {len(message)}')
-            recovered = pickle.loads(message)
-
-            if prompt := recovered.get('prompt'):
-                self.osd_prompt_slogan_text = prompt
-                logger.debug(f'Updated prompt: {prompt}')
-
-            if recovered.get('task_name') == 'SSVEP':
-                self.task_buffer.append(('SSVEP', recovered))
-                logger.debug('Received SSVEP task')
-
-            if recovered.get('task_name') == 'setUserProfile':
-                profile = recovered.get(
-                    'profile', dict(Error='Invalid user profile'))
-                self.osd_user_profile_text = '\n'.join(
-                    [f'{k}\t {v}' for k, v in profile.items()])
-                logger.debug('Received setUserProfile task')
-
-            if recovered.get('task_name') == 'checkoutDisplayStatus':
-                msg = dict(
-                    # Overall tasks
-                    currentTask=self.current_task.name,
-                    tasksInWait=len(self.task_buffer),
-
-                    # Time of the current task
-                    passed=self.passed,
-                    totalLength=self.total_length if hasattr(
-                        self, 'total_length') else 'N.A.',
-                    remain=self.total_length - self.passed if hasattr(
-                        self, 'total_length') else 'N.A.',
-
-                    # The event buffer of the latest task
-                    eventBuffer='\n'.join(
-                        [f'{e}' for e in self.fifo_event_buffer.pop(0)]) if self.fifo_event_buffer else ''
-                )
-                pkg = pickle.dumps(msg)
-                websocket.send(pkg)
-                continue
-
-            websocket.send('OK')
-
-    def serve_forever(self):
-        Thread(target=self._serve_forever, args=(), daemon=True).start()
-
-    def _serve_forever(self):
-        with websockets.sync.server.serve(self.ws_echo, self.host, self.port, max_size=self.max_size) as server:
-            server.serve_forever()
-
-
 class MainWindow(MyWebsocketServer):
     # Basic initialization
     resolution_x = 1920
@@ -153,22 +84,45 @@ class MainWindow(MyWebsocketServer):
         anchorHoriz='left', alignText='left'
     )
 
-    # Task buffer
-    task_buffer = []
-
-    # Event buffer
-    event_buffer = []
-    fifo_event_buffer = []
+    # The SSVEP image stim and the blocks in wait
+    img_full_screen = None
+    native_patches = None
+    # The changed regions of the image stim are uploaded,
+    # the last_row is the gray levels on the screen
+    uploader = None
+    last_row = None
+    ssvep_blocks = deque()
+
+    # The task waiting for its synchronized start
+    pending_task = None
+    # Seconds, the refresh period of the monitor, it is measured at the startup
+    frame_interval = 1 / 60
+    # The stimulus is indexed by the frame instead of the wall time
+    frame_locked = True
+
+    # The largest dense luminance table (bytes), the longer body is streamed
+    dense_table_limit = 64 * 1024 * 1024
 
     # Timing machine
     current_task = AvailableCurrentTasks.IDLE
     tic = time.time()
     passed = -1
     frame_count = 0
+    # The frame index since the start, it is never reset
+    frame_index = 0
+    # The trial being profiled
+    profile_trial = None
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, host: str = None, port: int = None):
+        # Measure the refresh before the tasks are compiled
         self.win.winHandle.activate()
+        self.frame_interval = measure_frame_interval(
+            self.win.flip) or self.frame_interval
+        self.frame_clock = FrameClock(self.frame_interval)
+        super().__init__(host, port)
+        # The markers of the frame are fired after its flip
+        self.marker = MarkerPublisher()
+        self.frame_markers = []
         self.set_as_idle_screen()
         logger.info('Initialized')
 
@@ -180,9 +134,14 @@ class MainWindow(MyWebsocketServer):
         logger.debug('Set as debug mode')
 
     def ssvep__stop__(self):
+        self.ssvep_flush_events()
+
         self.img_full_screen.setAutoDraw(False)
         del self.img_full_screen
         self.img_full_screen = None
+        if self.native_patches is not None:
+            self.native_patches.set_auto_draw(False)
+            self.native_patches = None
         del self.total_length
 
         self.set_as_idle_screen()
@@ -191,73 +150,182 @@ class MainWindow(MyWebsocketServer):
         self.frame_count = 0
         self.osd_prompt_slogan_text = 'SSVEP experiment finished'
 
-        logger.debug(f'SSVEP experiment finished, {self.event_buffer}')
-        self.fifo_event_buffer.append(list(self.event_buffer))
+    def record_event(self, kind: str, label: str = '', passed: float = None):
+        return self.recorder.record(
+            kind, label, self.frame_index, self.passed if passed is None else passed)
+
+    def mark(self, kind: str, label: str = '', passed: float = None):
+        '''Mark the onset of the frame, it is fired and recorded after the flip'''
+        self.frame_markers.append(
+            (kind, label, self.passed if passed is None else passed))
 
-    def ssvep__init__(
+    def flip(self):
+        profiling = self.current_task == AvailableCurrentTasks.SSVEP
+        if profiling:
+            self.profiler.lap(DRAW)
+        self.win.flip()
+        # The onset is the time when the flip returns
+        t_ns = time.perf_counter_ns()
+
+        # The markers go out first, the profiling and the drops are after them
+        for kind, label, passed in self.frame_markers:
+            self.marker.fire(kind, label, self.frame_index, t_ns)
+            seq = self.recorder.record(
+                kind, label, self.frame_index, passed, t_ns)
+            if kind == 'blockStart':
+                self.block_start_seq = seq
+                self.block_start_ns = t_ns
+        self.frame_markers.clear()
+
+        if profiling:
+            # The flip phase ends when the flip returns
+            self.profiler.lap(FLIP, t_ns)
+            if dropped := self.frame_clock.tick(t_ns):
+                self.recorder.record(
+                    'frameDrop', f'{dropped}', self.frame_index, self.passed, t_ns)
+                logger.warning(
+                    f'Dropped {dropped} frames before the frame {self.frame_index}, passed: {self.passed:.4f}')
+            self.profiler.end(self.frame_index, t_ns, dropped)
+
+    def ssvep_end_trial(self):
+        '''Summarize the profiled trial into the status'''
+        if summary := self.profiler.end_trial():
+            self.status.publish(frameProfile=summary)
+        self.profile_trial = None
+
+    def ssvep_flush_events(self):
+        self.ssvep_end_trial()
+        seq = self.record_event('blockStop')
+        events = [
+            f"{(e['kind'], e['label'], round(e['passed'], 4), e['frame'])}"
+            for e in events_to_dicts(self.recorder.since(self.block_start_seq))
+            if e['seq'] < seq]
+        logger.debug(f'SSVEP block finished, {len(events)} events')
+        self.put_event_buffer(events)
+
+    def ssvep_compile(
             self, resolution_x=None, resolution_y=None,
             repeats=None, cue=None,
-            df_layout=None, df_ts=None,
             head_length=None, body_length=None, tail_length=None,
-            background_image_data_url=None,
-            patch_shape=None,
-            ** kwargs):
-
-        if background_image_data_url == '' or background_image_data_url is None:
+            patch_shape=None, stimulus_interval=None,
+            background_image_hash=None, arrays=None,
+            render_mode='palette',
+            ** kwargs) -> dict:
+        '''
+        Compile the block into the attributes of the SSVEP task.
+        It computes on the CPU only, so it runs off the render thread.
+
+        The render_mode is
+            - palette: The patch pixels are filled by the lookup table of the label map;
+            - pil: The patches are drawn by PIL every frame;
+            - native: The patches are the psychopy stims over the static background.
+
+        Raises:
+            - KeyError: The background image is not cached, e.g. it is evicted since the check.
+        '''
+        if background_image_hash is not None:
+            # Copy the cached array, the patches are drawn on the img
+            rgb = self.image_cache.get_rgb(
+                background_image_hash, (resolution_x, resolution_y))
+            img = Image.fromarray(np.array(rgb))
+            logger.debug('background image is provided')
+        else:
             logger.debug('background image is empty')
             img = Image.fromarray(
                 np.zeros((resolution_y, resolution_x))).convert('RGB')
-        else:
-            logger.debug('background image is provided')
-            img = convert_data_url_to_img(background_image_data_url).convert('RGB').resize(
-                (resolution_x, resolution_y))
-
-        draw = ImageDraw.Draw(img)
-        self.img = img
-        self.draw = draw
-        print(img)
 
-        img_full_screen = visual.ImageStim(win=self.win, image=img)
-        self.img_full_screen = img_full_screen
+        trial_length = head_length + body_length + tail_length
+        block = dict(
+            img=img,
+            draw=ImageDraw.Draw(img),
+            patch_shape=patch_shape,
+            resolution_x=resolution_x,
+            resolution_y=resolution_y,
+            repeats=repeats,
+            cue=cue,
+            layout=arrays['layout'],
+            stimulus_interval=stimulus_interval,
+            stimulus_arrays=arrays,
+            head_length=head_length,
+            body_length=body_length,
+            tail_length=tail_length,
+            trial_length=trial_length,
+            total_length=trial_length * repeats,
+            render_mode=render_mode,
+            renderer=None,
+        )
+
+        self.ssvep_mk_patches(block)
+
+        # The label map is rasterized once
+        if render_mode == 'palette':
+            block['renderer'] = PaletteRenderer(
+                img, block['patches_xy'], patch_shape)
+            block['img'] = block['renderer'].img
+
+        return block
+
+    def ssvep__init__(self, block: dict):
+        # The image stim is reused by the next block of the same resolution
+        reuse = self.img_full_screen is not None and self.img.size == block['img'].size
+
+        for k, v in block.items():
+            setattr(self, k, v)
+
+        if reuse:
+            self.img_full_screen.image = self.img
+        else:
+            if self.img_full_screen is not None:
+                self.img_full_screen.setAutoDraw(False)
+            self.img_full_screen = visual.ImageStim(
+                win=self.win, image=self.img)
+
+        # The native patches are created in the render thread,
+        # the background is uploaded once
+        if self.native_patches is not None:
+            self.native_patches.set_auto_draw(False)
+            self.native_patches = None
+        if self.render_mode == 'native':
+            self.native_patches = NativePatches(
+                self.win, self.img.size, self.patches_xy, self.patch_shape)
+
+        self.last_row = None
+        if self.native_patches is None:
+            self.uploader = TextureUploader(
+                self.img_full_screen, self.img, self.patches_xy)
+        else:
+            # The native patches upload nothing
+            self.uploader = None
 
         # Put the timer on the top center
-        self.osd_timer_slogan.pos = (0, resolution_y/2 - 20)
+        self.osd_timer_slogan.pos = (0, self.resolution_y/2 - 20)
         # Put the pnt on the north-east corner
-        self.blinking_pnt.pos = (resolution_x/2-10, resolution_y/2-10)
+        self.blinking_pnt.pos = (self.resolution_x/2-10, self.resolution_y/2-10)
 
-        # --------------------
-        self.patch_shape = patch_shape
-        self.resolution_x = resolution_x
-        self.resolution_y = resolution_y
-        self.repeats = repeats
-        self.cue = cue
-        self.df_layout = df_layout
-        self.df_ts = df_ts
-        self.head_length = head_length
-        self.body_length = body_length
-        self.tail_length = tail_length
-        self.trial_length = head_length + body_length + tail_length
-        self.total_length = self.trial_length * self.repeats
         self.last_state = 'init'
 
-        self.ssvep_mk_patches()
+        logger.debug('Initialized SSVEP')
+
+    def ssvep_show(self):
+        '''Show the initialized block, its onset is the next flip'''
+        native_stims = self.native_patches.stims if self.native_patches else []
 
         self.osd_user_profile.setAutoDraw(False)
         self.osd_prompt_slogan.setAutoDraw(False)
-        for e in [self.img_full_screen, self.osd_timer_slogan, self.blinking_pnt]:
+        for e in [self.img_full_screen, *native_stims, self.osd_timer_slogan, self.blinking_pnt]:
             e.setAutoDraw(False)
             e.setAutoDraw(True)
 
-        self.event_buffer = []
+        self.mark('blockStart', passed=0)
 
-        logger.debug('Initialized SSVEP')
-
-    def ssvep_mk_patches(self):
+    def ssvep_mk_patches(self, block: dict):
         # --------------------
         patches = {}
-        ts_objs = {}
+        patches_xy = []
         names = []
-        for i, se in self.df_layout.iterrows():
+        layout = block['layout']
+        for se in layout:
+            se = dict(zip(layout.dtype.names, se.tolist()))
             name = se['name']
             xy = [
                 se['x']-se['w']/2,
@@ -266,31 +334,84 @@ class MainWindow(MyWebsocketServer):
                 se['y'] + se['h']/2]
             dct = dict(se, xy=xy)
             patches[name] = dct
-            ts_objs[name] = self.df_ts[
-                self.df_ts['name'] == name]['value'].to_numpy()
-            seconds = self.df_ts[
-                self.df_ts['name'] == name]['seconds'].to_numpy()
+            patches_xy.append(xy)
             names.append(name)
 
-        self.seconds = seconds
-        self.ts_objs = ts_objs
-        self.patches = patches
+        block['patches'] = patches
 
         # --------------------
-        if self.cue == '!Random':
-            trials_cue = random.choices(names, k=self.repeats)
-        elif self.cue == '!NoCue':
-            trials_cue = [None] * self.repeats
+        # Compile the body into the (n_samples, n_patches) gray levels,
+        # the columns follow the order of the names.
+        # The frame-locked body has one sample per frame.
+        # The long body is streamed in chunks instead.
+        arrays = block['stimulus_arrays']
+        spec = StimulusSpec(
+            names, arrays['omega'], arrays['phi'], arrays['from_csv'], arrays['loops'], block['stimulus_interval'])
+        interval = self.frame_interval if self.frame_locked else spec.interval
+        n_samples = int(round(block['body_length'] / interval))
+        if n_samples * len(names) <= self.dense_table_limit:
+            block['luminance_table'] = LuminanceTable(
+                float2gray(spec.chunk(0, n_samples, interval)), names, interval)
         else:
-            trials_cue = [self.cue] * self.repeats
+            block['luminance_table'] = StreamingLuminance(
+                spec, n_samples, interval=interval)
+        block['patches_xy'] = patches_xy
+        block['draw_patch'] = dict(
+            rectangle=block['draw'].rectangle,
+            ellipse=block['draw'].ellipse).get(block['patch_shape'])
 
-        self.trials_cue = trials_cue
+        # --------------------
+        cue = block['cue']
+        repeats = block['repeats']
+        if cue == '!Random':
+            trials_cue = random.choices(names, k=repeats)
+        elif cue == '!NoCue':
+            trials_cue = [None] * repeats
+        else:
+            trials_cue = [cue] * repeats
+
+        block['trials_cue'] = trials_cue
+
+        # --------------------
+        # The gray levels of the head and tail are fixed in the trial
+        block['tail_row'] = np.full(len(names), 100, dtype=np.uint8)
+        block['trials_head_row'] = []
+        for cue in trials_cue:
+            row = block['tail_row'].copy()
+            row[[e == cue for e in names]] = 255
+            block['trials_head_row'].append(row)
 
         return patches, trials_cue
 
+    def ssvep_draw_patches(self, row):
+        if self.native_patches is not None:
+            self.native_patches.update(row)
+            return
+
+        # The unchanged frame is neither painted nor uploaded
+        changed = None if self.last_row is None else np.flatnonzero(
+            row != self.last_row)
+        if changed is not None and len(changed) == 0:
+            self.profiler.lap(DRAW)
+            self.uploader.upload(changed)
+            self.profiler.lap(UPLOAD)
+            return
+
+        if self.renderer is not None:
+            self.renderer.update(row, changed)
+        elif self.draw_patch is not None:
+            # The overlapped patches are drawn in order
+            for xy, gray in zip(self.patches_xy, row.tolist()):
+                self.draw_patch(xy=xy, fill=gray2rgb(gray))
+        self.profiler.lap(DRAW)
+
+        self.uploader.upload(changed)
+        self.profiler.lap(UPLOAD)
+        self.last_row = row.copy()
+
     def ssvep_update_frame(self, passed):
         t = passed % (self.trial_length)
-        i = np.min([self.repeats-1, int(passed // self.trial_length)])
+        i = min(self.repeats-1, int(passed // self.trial_length))
 
         state = 'head'
         if t > self.head_length:
@@ -300,107 +421,113 @@ class MainWindow(MyWebsocketServer):
 
         self.osd_timer_slogan.text += f' | {i+1} trial | {state}'
 
+        if i != self.profile_trial:
+            self.ssvep_end_trial()
+            self.profiler.start_trial(
+                trial=i+1, cue=self.trials_cue[i], startFrame=self.frame_index, passed=round(passed, 4))
+            self.profile_trial = i
+
         if state == 'head':
             cue = self.trials_cue[i]
-            for k, se in self.patches.items():
-                xy = se['xy']
-
-                if se['name'] == cue:
-                    if self.patch_shape == 'rectangle':
-                        self.draw.rectangle(xy=xy, fill=gray2rgb(255))
-                    elif self.patch_shape == 'ellipse':
-                        self.draw.ellipse(xy=xy, fill=gray2rgb(255))
-                else:
-                    if self.patch_shape == 'rectangle':
-                        self.draw.rectangle(xy=xy, fill=gray2rgb(100))
-                    elif self.patch_shape == 'ellipse':
-                        self.draw.ellipse(xy=xy, fill=gray2rgb(100))
-
-            self.img_full_screen.image = self.img
+            self.ssvep_draw_patches(self.trials_head_row[i])
 
             if not self.last_state == 'head':
-                self.event_buffer.append(('displayHead', cue, passed))
+                self.mark('displayHead', cue, passed)
 
         if state == 'body':
             tt = t - self.head_length
-            j = len(self.seconds[self.seconds < tt])
-            for k, se in self.patches.items():
-                try:
-                    xy = se['xy']
-                    x = self.ts_objs[k][j]
-
-                    if self.patch_shape == 'rectangle':
-                        self.draw.rectangle(xy=xy, fill=gray2rgb(int(x*255)))
-                    elif self.patch_shape == 'ellipse':
-                        self.draw.ellipse(xy=xy, fill=gray2rgb(int(x*255)))
-
-                except Exception:
-                    pass
-            self.img_full_screen.image = self.img
+            self.ssvep_draw_patches(self.luminance_table.row(tt))
 
             if not self.last_state == 'body':
-                self.event_buffer.append(('displayBody', passed))
+                self.mark('displayBody', passed=passed)
 
         if state == 'tail':
-            for k, se in self.patches.items():
-                xy = se['xy']
-
-                if self.patch_shape == 'rectangle':
-                    self.draw.rectangle(xy=xy, fill=gray2rgb(100))
-                elif self.patch_shape == 'ellipse':
-                    self.draw.ellipse(xy=xy, fill=gray2rgb(100))
-
-            self.img_full_screen.image = self.img
+            self.ssvep_draw_patches(self.tail_row)
 
             if not self.last_state == 'tail':
-                self.event_buffer.append(('displayTail', passed))
+                self.mark('displayTail', passed=passed)
 
         self.last_state = state
 
         self._update_pnt_color()
-        self.win.flip()
+        self.flip()
         return passed
 
     def main_loop(self):
         logger.debug('Starting main loop...')
         while True:
+            # Apply the texts posted by the websocket thread between the frames
+            for k, v in self.osd_mailbox.take().items():
+                setattr(self, k, v)
+
             if self.current_task == AvailableCurrentTasks.IDLE:
                 self._on_frame_flip()
                 self.osd_prompt_slogan.text = self.osd_prompt_slogan_text
                 # self.osd_prompt_slogan.draw()
                 self.osd_user_profile.text = self.osd_user_profile_text
 
-                if len(self.task_buffer) == 0:
-                    self.win.flip()
+                task = self.pending_task or self.task_queue.get()
+                if task is None:
+                    self.flip()
                     continue
 
-                name, stuff = self.task_buffer.pop(0)
+                name, stuff = task
 
-                logger.debug(f'Received task: {name}, stuff: {list(stuff)}')
-
-                if name == 'SSVEP':
+                # The stims of the first block are set up when the task is received,
+                # so the GL setup is not in the onset of the synchronized start
+                if name == 'SSVEP' and task is not self.pending_task:
+                    logger.debug(
+                        f'Received task: {name}, stuff: {list(stuff)}')
                     try:
-                        self.ssvep__init__(**stuff)
-                        self.ssvep_mk_patches()
-                        self.start_task(AvailableCurrentTasks.SSVEP)
+                        # The blocks are compiled, they are switched without the idle frames
+                        self.ssvep_blocks = deque(stuff['blocks'])
+                        self.ssvep__init__(self.ssvep_blocks.popleft())
                     except Exception as error:
                         logger.error(f'Failed to initialize SSVEP: {error}')
                         import traceback
                         traceback.print_exc()
+                        self.pending_task = None
+                        self.flip()
+                        continue
+
+                # The task of the synchronized start is held until its last idle frame,
+                # then it waits for the start time
+                if (start_at := stuff.get('start_at_ns')) is not None:
+                    if start_at - time.perf_counter_ns() > self.frame_interval * 1e9:
+                        self.pending_task = task
+                        self.flip()
+                        continue
+                    self.pending_task = None
+                    while time.perf_counter_ns() < start_at:
+                        pass
 
-                    self.win.flip()
+                if name == 'SSVEP':
+                    self.ssvep_show()
+                    self.start_task(AvailableCurrentTasks.SSVEP)
+                    self.flip()
+                    # The start is the first flip of the block
+                    if task_id := stuff.get('task_id'):
+                        self.put_task_start(task_id, self.block_start_ns)
                     continue
 
             if self.current_task == AvailableCurrentTasks.SSVEP:
                 passed = self._on_frame_flip()
+                if passed > self.total_length and self.ssvep_blocks:
+                    self.ssvep_flush_events()
+                    self.ssvep__init__(self.ssvep_blocks.popleft())
+                    self.ssvep_show()
+                    self.start_task(AvailableCurrentTasks.SSVEP)
+                    logger.debug('SSVEP next block')
+                    continue
+
                 if passed > self.total_length:
                     self.ssvep__stop__()
                     self.current_task = AvailableCurrentTasks.IDLE
                     logger.debug('SSVEP finished')
                     continue
 
+                # The frame is flipped by the update
                 self.ssvep_update_frame(passed)
-                self.win.flip()
                 continue
 
         logger.debug(f'Finished main loop...')
@@ -408,8 +535,25 @@ class MainWindow(MyWebsocketServer):
 
     def start_task(self, task):
         self.tic = time.time()
+        self.tic_ns = time.perf_counter_ns()
         self.frame_count = 0
+        self.frame_clock.start()
+        self.profiler.start_block()
         self.current_task = task
+        self._publish_status()
+
+    def _publish_status(self):
+        total_length = getattr(self, 'total_length', None)
+        self.status.publish(
+            # The display clock, it is converted into the server clock by the ClockSync
+            t_ns=time.perf_counter_ns(),
+            currentTask=self.current_task.name,
+            passed=round(self.passed, 2),
+            totalLength='N.A.' if total_length is None else total_length,
+            remain='N.A.' if total_length is None else round(total_length - self.passed, 2),
+            textureUpload=None if self.uploader is None else self.uploader.summary(),
+            frameInterval=round(self.frame_interval, 6),
+            droppedFrames=self.frame_clock.dropped)
 
     def safe_stop(self):
         self.win.close()
@@ -426,22 +570,30 @@ class MainWindow(MyWebsocketServer):
                 logger.debug('Stopping display since <escape> is pressed')
                 self.safe_stop()
 
-            self.event_buffer.append(('keyPress', name, passed))
+            self.record_event('keyPress', name, passed)
             logger.debug(f'Key pressed", {name}')
         return passed
 
     def _update_timer(self):
-        passed = time.time() - self.tic
-        self.passed = passed
+        elapsed = time.time() - self.tic
         self.frame_count += 1
+        self.frame_index += 1
+
+        # The frame-locked task counts the frames, its first frame is at 0
+        if self.frame_locked and self.current_task == AvailableCurrentTasks.SSVEP:
+            passed = self.frame_clock.passed(self.frame_count - 1)
+        else:
+            passed = elapsed
+        self.passed = passed
 
         minutes = int(passed // 60)
         seconds = int((passed // 1) % 60)
         remain = int((passed % 1)*100)
 
-        frame_rate = self.frame_count / np.max([passed, 0.1])
+        frame_rate = self.frame_count / np.max([elapsed, 0.1])
 
         self.osd_timer_slogan.text = f'{minutes}:{seconds:02d}:{remain:02d} | {frame_rate:0.2f}Hz'
+        self._publish_status()
         return passed
 
     def _update_pnt_color(self):
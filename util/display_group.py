@@ -0,0 +1,169 @@
+"""
+File: display_group.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Send one task to several displays, and start them at the same time
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import os
+import time
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+
+from . import logger
+from .clock_sync import ClockSync
+from .protocol import encode_message, decode_message
+from .websocket_client import MyWebsocketClient
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+class DisplayNode(object):
+    '''
+    The display of the group, with its connection pool and its clock.
+    '''
+
+    def __init__(self, url: str):
+        self.url = url
+        self.client = MyWebsocketClient(url)
+        self.clock = ClockSync(self.client).start()
+
+    def request(self, meta: dict, arrays: dict = None, blobs: dict = None) -> dict:
+        got, _, _ = decode_message(self.client.send(
+            encode_message(meta, arrays, blobs)))
+        return got
+
+    def send_task(self, meta: dict, arrays: dict, images: dict) -> dict:
+        '''
+        Send the task and return the reply,
+        the images are sent only if the display misses them.
+        '''
+        got = self.request(meta, arrays)
+        if got.get('missing'):
+            logger.debug(f'Upload {got["missing"]} to {self.url}')
+            got = self.request(meta, arrays, images)
+        return got
+
+    def ensure_clock(self, pings: int = 4):
+        '''Ping the clock until it is synchronized'''
+        for _ in range(pings):
+            if self.clock.model is not None:
+                break
+            self.clock.ping()
+        if self.clock.model is None:
+            raise RuntimeError(f'Clock of {self.url} is not synchronized')
+
+
+class DisplayGroup(object):
+    '''
+    The displays of one experiment, e.g. the monitors of the hyperscanning.
+
+    The single display runs the task as soon as it is received.
+    The several displays run the two-phase start:
+        1. prepare: every display compiles the task and holds it;
+        2. commit: every display is given the same start time on the server clock,
+           converted into its own clock by the ClockSync;
+        3. every display reports its actual start, the skew is the difference to the start time.
+    The prepared tasks are aborted if any display fails to prepare.
+    '''
+    start_lead = 0.5  # Seconds between the commit and the start
+
+    def __init__(self, urls: list):
+        self.nodes = [DisplayNode(url) for url in urls]
+        self.executor = ThreadPoolExecutor(max(4, len(self.nodes)))
+
+    @classmethod
+    def from_env(cls, name: str = 'SSVEP_DISPLAY_URLS'):
+        '''The urls are separated by "," in the environment variable'''
+        urls = [e.strip() for e in os.environ.get(
+            name, MyWebsocketClient.url).split(',') if e.strip()]
+        logger.info(f'Display group: {urls}')
+        return cls(urls)
+
+    def _map(self, fn, *args):
+        '''Run the fn(node, *args) on every node, the exception is returned as the error'''
+        def run(node):
+            try:
+                return fn(node, *args)
+            except Exception as error:
+                logger.error(f'Failed on {node.url}: {error}')
+                return dict(error=f'{error}')
+        return list(self.executor.map(run, self.nodes))
+
+    def run_task(self, meta: dict, arrays: dict, images: dict) -> dict:
+        '''
+        Run the task on every display.
+
+        Returns:
+            - result: The replies of the nodes, with the start time and the skews of the synchronized start.
+        '''
+        if len(self.nodes) == 1:
+            got = self._map(DisplayNode.send_task, meta, arrays, images)[0]
+            return dict(nodes=[dict(got, url=self.nodes[0].url)])
+
+        task_id = uuid.uuid4().hex
+
+        # ---- Prepare ----
+        def prepare(node):
+            node.ensure_clock()
+            return node.send_task(dict(meta, taskId=task_id, prepare=True), arrays, images)
+
+        replies = self._map(prepare)
+        if not all(e.get('prepared') for e in replies):
+            self._map(DisplayNode.request, dict(
+                task_name='abortTask', taskId=task_id))
+            return dict(taskId=task_id, nodes=[
+                dict(e, url=node.url) for node, e in zip(self.nodes, replies)])
+
+        # ---- Commit ----
+        start_at = time.time_ns() + int(self.start_lead * 1e9)
+
+        def commit(node):
+            return node.request(dict(
+                task_name='commitTask', taskId=task_id, startAtNs=node.clock.to_display(start_at)))
+
+        replies = self._map(commit)
+        if not all(e.get('ok') for e in replies):
+            return dict(taskId=task_id, startAtNs=start_at, nodes=[
+                dict(e, url=node.url) for node, e in zip(self.nodes, replies)])
+
+        # ---- Measure the skews ----
+        def wait_start(node):
+            got = node.request(dict(
+                task_name='waitStart', taskId=task_id, timeout=self.start_lead + 2))
+            if (started := got.get('startedNs')) is None:
+                return got
+            t, uncertainty = node.clock.to_server(started)
+            return dict(ok=True, startedNs=t, skewNs=t - start_at, uncertaintyNs=uncertainty)
+
+        replies = self._map(wait_start)
+        logger.debug(
+            f'Started task {task_id}, skews: {[e.get("skewNs") for e in replies]}')
+        return dict(taskId=task_id, startAtNs=start_at, nodes=[
+            dict(e, url=node.url) for node, e in zip(self.nodes, replies)])
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
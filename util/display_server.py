@@ -0,0 +1,329 @@
+"""
+File: display_server.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    The websocket server of the display, it does not depend on the psychopy
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import time
+
+from enum import Enum
+from threading import Thread
+from collections import deque
+
+import websockets
+import websockets.sync.server
+
+from websockets.exceptions import ConnectionClosed
+
+from . import logger
+from .event_recorder import EventRecorder, events_to_dicts
+from .frame_profiler import FrameProfiler
+from .handoff import TaskQueue, EventQueue, StatusSnapshot, Mailbox
+from .image_cache import ImageCache
+from .protocol import pack_envelope, unpack_envelope, encode_message, decode_message
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+class AvailableCurrentTasks(Enum):
+    IDLE = 1
+    SSVEP = 2
+
+
+class MyWebsocketServer(object):
+    host = 'localhost'
+    port = 23335
+    max_size = 300000000
+
+    # The max rate (updates per second) of the status stream
+    status_max_rate = 10
+
+    # The max number of the tasks in wait
+    task_queue_size = 16
+
+    # The event buffers of the recent blocks kept for the status stream
+    event_history_size = 64
+
+    # The folder of the event journals
+    event_journal_root = 'log/events'
+
+    # Seconds to wait for the start of the committed task
+    start_timeout = 5
+
+    # Seconds to keep the prepared tasks and the start times nobody claims
+    handoff_ttl = 60
+
+    def __init__(self, host: str = None, port: int = None):
+        if host:
+            self.host = host
+        if port:
+            self.port = port
+        # The websocket thread never touches the render loop directly,
+        # the tasks, events, status and OSD texts are handed off
+        self.task_queue = TaskQueue(self.task_queue_size)
+        self.fifo_event_buffer = EventQueue()
+        self.status = StatusSnapshot(
+            currentTask=AvailableCurrentTasks.IDLE.name,
+            passed=-1, totalLength='N.A.', remain='N.A.')
+        self.osd_mailbox = Mailbox()
+        # The background images of this display, keyed by the hash
+        self.image_cache = ImageCache()
+        # The (seq, events) of the finished blocks, the seq is the running count
+        self.event_history = deque(maxlen=self.event_history_size)
+        self.event_history_count = 0
+        self.recorder = EventRecorder(
+            f'{self.event_journal_root}/{self.port}')
+        # The frame timing is journaled next to the events
+        self.profiler = FrameProfiler(
+            f'{self.event_journal_root}/{self.port}')
+        # The prepared tasks wait for the commit, the start times are waited by the group,
+        # both are kept as (time, value) and expired after the handoff_ttl
+        self.prepared = {}
+        self.task_starts = {}
+        self.serve_forever()
+
+    def ws_echo(self, websocket):
+        for message in websocket:
+            # The receive time of the clock ping
+            t1 = time.perf_counter_ns()
+            logger.debug(f'Received {message[:20]}, {len(message)}')
+            rid, message = unpack_envelope(message)
+
+            def reply(pkg):
+                # The response carries the id of the request
+                websocket.send(pkg if rid is None else pack_envelope(rid, pkg))
+
+            # The arrays wrap the message without copying, nothing is unpickled
+            try:
+                recovered, arrays, blobs = decode_message(message)
+            except ValueError as error:
+                logger.error(f'Dropped invalid message: {error}')
+                reply(encode_message(dict(error=f'{error}')))
+                continue
+
+            if recovered.get('task_name') == 'clockPing':
+                reply(encode_message(dict(
+                    t0=recovered.get('t0'), t1=t1, t2=time.perf_counter_ns())))
+                continue
+
+            if prompt := recovered.get('prompt'):
+                self.osd_mailbox.post(osd_prompt_slogan_text=prompt)
+                logger.debug(f'Updated prompt: {prompt}')
+
+            if recovered.get('task_name') in ('SSVEP', 'SSVEPBatch'):
+                # The batch is the list of blocks,
+                # the arrays of the ith block are named as 'i/name'
+                if recovered.get('task_name') == 'SSVEP':
+                    blocks = [dict(recovered, arrays=arrays)]
+                else:
+                    blocks = [
+                        dict(e, arrays={
+                            k.split('/', 1)[1]: v for k, v in arrays.items() if k.startswith(f'{i}/')})
+                        for i, e in enumerate(recovered.get('blocks', []))]
+
+                # The images are uploaded once, keyed by the hash,
+                # the later tasks send only the hash
+                for image in blobs.values():
+                    self.image_cache.put(image)
+                missing = sorted(set(
+                    h for e in blocks
+                    if (h := e.get('background_image_hash')) and not self.image_cache.has(h)))
+                if missing:
+                    logger.debug(f'Missing background images {missing}')
+                    reply(encode_message(dict(missing=missing)))
+                    continue
+
+                # Compile the blocks here, not on the render thread
+                try:
+                    blocks = [self.ssvep_compile(**e) for e in blocks]
+                except Exception as error:
+                    # The image evicted since the check is uploaded again
+                    missing = sorted(set(
+                        h for e in blocks
+                        if (h := e.get('background_image_hash')) and not self.image_cache.has(h)))
+                    if isinstance(error, KeyError) and missing:
+                        logger.debug(f'Evicted background images {missing}')
+                        reply(encode_message(dict(missing=missing)))
+                        continue
+                    logger.error(f'Failed to compile SSVEP: {error}')
+                    reply(encode_message(dict(error=f'Failed to compile: {error}')))
+                    continue
+
+                task = ('SSVEP', dict(
+                    blocks=blocks, task_id=recovered.get('taskId'), start_at_ns=None))
+
+                # The prepared task starts on commit (two-phase start of the display group)
+                if recovered.get('prepare'):
+                    self._expire_handoffs()
+                    self.prepared[recovered.get('taskId')] = (time.time(), task)
+                    logger.debug(f'Prepared SSVEP task {recovered.get("taskId")}')
+                    reply(encode_message(dict(ok=True, prepared=True)))
+                    continue
+
+                if not self.task_queue.put(task):
+                    logger.warning('Rejected SSVEP task, the task queue is full')
+                    reply(encode_message(dict(
+                        busy=True, tasksInWait=len(self.task_queue))))
+                    continue
+                logger.debug(f'Received SSVEP task, {len(blocks)} blocks')
+
+            if recovered.get('task_name') == 'commitTask':
+                self._expire_handoffs()
+                _, task = self.prepared.pop(recovered.get('taskId'), (None, None))
+                if task is None:
+                    reply(encode_message(dict(error='Unknown task')))
+                    continue
+
+                # The start time is on the display clock
+                task[1]['start_at_ns'] = recovered.get('startAtNs')
+                if not self.task_queue.put(task):
+                    logger.warning('Rejected SSVEP task, the task queue is full')
+                    reply(encode_message(dict(
+                        busy=True, tasksInWait=len(self.task_queue))))
+                    continue
+                logger.debug(f'Committed task {recovered.get("taskId")}')
+
+            if recovered.get('task_name') == 'abortTask':
+                self.prepared.pop(recovered.get('taskId'), None)
+                logger.debug(f'Aborted task {recovered.get("taskId")}')
+
+            if recovered.get('task_name') == 'waitStart':
+                # The render loop puts the start time of the task
+                task_id = recovered.get('taskId')
+                deadline = time.time() + \
+                    recovered.get('timeout', self.start_timeout)
+                while task_id not in self.task_starts and time.time() < deadline:
+                    time.sleep(0.001)
+                _, started = self.task_starts.pop(task_id, (None, None))
+                reply(encode_message(
+                    dict(startedNs=started) if started is not None else dict(error='Not started')))
+                continue
+
+            if recovered.get('task_name') == 'setUserProfile':
+                profile = recovered.get(
+                    'profile', dict(Error='Invalid user profile'))
+                self.osd_mailbox.post(osd_user_profile_text='\n'.join(
+                    [f'{k}\t {v}' for k, v in profile.items()]))
+                logger.debug('Received setUserProfile task')
+
+            if recovered.get('task_name') == 'checkoutDisplayStatus':
+                events = self.fifo_event_buffer.get()
+                msg = dict(
+                    self.checkout_status(),
+                    # The event buffer of the latest task
+                    eventBuffer='\n'.join(
+                        [f'{e}' for e in events]) if events is not None else '',
+                    # The seq of the next event
+                    nextEvent=self.recorder.count,
+                    # The presentation quality of the recent frames and trials
+                    frameRecent=self.profiler.recent(),
+                    frameTrials=list(self.profiler.trials),
+                )
+
+                # The clients fetch only the new events
+                if (seq := recovered.get('sinceEvent')) is not None:
+                    msg['events'] = events_to_dicts(
+                        self.recorder.since(int(seq)))
+                elif (t_ns := recovered.get('sinceTime')) is not None:
+                    msg['events'] = events_to_dicts(
+                        self.recorder.since_time(int(t_ns)))
+
+                reply(encode_message(msg))
+                continue
+
+            if recovered.get('task_name') == 'subscribeStatus':
+                # The connection is dedicated to the status stream from now on
+                reply(encode_message(dict(ok=True)))
+                self.stream_status(websocket, recovered.get('max_rate'))
+                return
+
+            reply(encode_message(dict(ok=True)))
+
+    def put_task_start(self, task_id: str, t_ns: int):
+        '''Hand off the start time of the task to its waitStart'''
+        self.task_starts[task_id] = (time.time(), t_ns)
+
+    def _expire_handoffs(self):
+        '''Drop the prepared tasks never committed and the start times never waited'''
+        deadline = time.time() - self.handoff_ttl
+        for table in (self.prepared, self.task_starts):
+            for k, (t, _) in list(table.items()):
+                if t < deadline:
+                    table.pop(k, None)
+                    logger.warning(f'Expired the unclaimed task {k}')
+
+    def put_event_buffer(self, events: list):
+        '''Hand off the event buffer of the finished block to the checkout and the status stream'''
+        self.fifo_event_buffer.put(events)
+        # The entry is appended before the count, the stream reads by the seq
+        self.event_history.append((self.event_history_count, events))
+        self.event_history_count += 1
+
+    def checkout_status(self) -> dict:
+        # The snapshot is published by the render loop every frame
+        return dict(self.status.get(), tasksInWait=len(self.task_queue))
+
+    def stream_status(self, websocket, max_rate: float = None):
+        '''
+        Push the changed items of the status at most max_rate times per second,
+        the event buffers of the finished tasks are pushed as the eventBuffers.
+        '''
+        interval = 1 / (max_rate or self.status_max_rate)
+        last = {}
+        cursor = self.event_history_count
+        logger.debug(f'Streaming status every {interval} seconds')
+
+        while True:
+            status = self.checkout_status()
+            delta = {k: v for k, v in status.items() if last.get(k) != v}
+
+            if cursor < self.event_history_count:
+                history = [e for e in list(self.event_history) if e[0] >= cursor]
+                if history:
+                    delta['eventBuffers'] = [
+                        '\n'.join([f'{e}' for e in events])
+                        for _, events in history]
+                    cursor = history[-1][0] + 1
+
+            if delta:
+                try:
+                    websocket.send(encode_message(delta))
+                except ConnectionClosed:
+                    logger.debug('Status stream is closed')
+                    return
+                last = status
+
+            time.sleep(interval)
+
+    def serve_forever(self):
+        Thread(target=self._serve_forever, args=(), daemon=True).start()
+
+    def _serve_forever(self):
+        with websockets.sync.server.serve(self.ws_echo, self.host, self.port, max_size=self.max_size) as server:
+            server.serve_forever()
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
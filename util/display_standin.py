@@ -0,0 +1,116 @@
+"""
+File: display_standin.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    The headless stand-in of the display, for testing the display group on localhost
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import sys
+import time
+
+from collections import deque
+from threading import Thread
+
+from . import logger
+from .display_server import AvailableCurrentTasks, MyWebsocketServer
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+class StandInDisplay(MyWebsocketServer):
+    '''
+    The display without the window.
+
+    It speaks the same protocol as the MainWindow,
+    and its render loop sleeps for the frames instead of flipping.
+    '''
+    frame_interval = 1 / 60  # Seconds
+
+    def __init__(self, host: str = None, port: int = None):
+        super().__init__(host, port)
+        Thread(target=self.main_loop, daemon=True).start()
+
+    def ssvep_compile(self, head_length=None, body_length=None, tail_length=None, repeats=None, **kwargs) -> dict:
+        trial_length = head_length + body_length + tail_length
+        return dict(total_length=trial_length * repeats)
+
+    def main_loop(self):
+        current_task = AvailableCurrentTasks.IDLE
+        blocks = deque()
+        pending = None
+        tic = 0
+        total_length = 0
+        frame = 0
+
+        while True:
+            time.sleep(self.frame_interval)
+            frame += 1
+            passed = time.perf_counter() - tic
+
+            if current_task == AvailableCurrentTasks.SSVEP and passed > total_length:
+                self.recorder.record('blockStop', frame=frame, passed=passed)
+                if blocks:
+                    total_length = blocks.popleft()['total_length']
+                    tic = time.perf_counter()
+                    self.recorder.record('blockStart', frame=frame)
+                else:
+                    current_task = AvailableCurrentTasks.IDLE
+
+            if current_task == AvailableCurrentTasks.IDLE:
+                task = pending or self.task_queue.get()
+                if task is not None:
+                    _, stuff = task
+                    start_at = stuff.get('start_at_ns')
+                    if start_at is not None and start_at - time.perf_counter_ns() > self.frame_interval * 1e9:
+                        pending = task
+                    else:
+                        pending = None
+                        while start_at is not None and time.perf_counter_ns() < start_at:
+                            pass
+                        tic_ns = time.perf_counter_ns()
+                        tic = tic_ns / 1e9
+                        blocks = deque(stuff['blocks'])
+                        total_length = blocks.popleft()['total_length']
+                        current_task = AvailableCurrentTasks.SSVEP
+                        self.recorder.record(
+                            'blockStart', frame=frame, t_ns=tic_ns)
+                        if task_id := stuff.get('task_id'):
+                            self.put_task_start(task_id, tic_ns)
+                        logger.debug(f'Started task {stuff.get("task_id")}')
+
+            self.status.publish(
+                t_ns=time.perf_counter_ns(),
+                currentTask=current_task.name,
+                passed=round(passed, 2))
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+if __name__ == '__main__':
+    # python -m util.display_standin 23336 23337 ...
+    ports = [int(e) for e in sys.argv[1:]] or [MyWebsocketServer.port]
+    standins = [StandInDisplay(port=port) for port in ports]
+    logger.info(f'Stand-in displays on {ports}')
+    while True:
+        time.sleep(1)
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
@@ -0,0 +1,169 @@
+"""
+File: event_recorder.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Record the display events into the ring buffer and the binary journal
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import json
+import time
+import numpy as np
+
+from pathlib import Path
+from datetime import datetime
+from threading import Thread, Event
+
+from . import logger
+
+# The kind of the event is stored as its index
+EVENT_KINDS = ['displayHead', 'displayBody', 'displayTail',
+               'keyPress', 'blockStart', 'blockStop', 'frameDrop']
+
+EVENT_DTYPE = np.dtype([
+    ('seq', '<u8'),  # The sequence number
+    ('t_ns', '<i8'),  # The perf_counter_ns
+    ('frame', '<u8'),  # The frame index
+    ('kind', '<u1'),  # The index of the EVENT_KINDS
+    ('label', 'S31'),  # The cue or the key name
+    ('passed', '<f8'),  # Seconds since the task start
+])
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def events_to_dicts(records: np.ndarray) -> list:
+    '''Convert the records into the JSON-able dicts'''
+    return [
+        dict(seq=seq, t_ns=t_ns, frame=frame, kind=EVENT_KINDS[kind],
+             label=label.decode(errors='replace'), passed=passed)
+        for seq, t_ns, frame, kind, label, passed in records.tolist()]
+
+
+def load_journal(path: Path) -> np.ndarray:
+    '''Load the records of the journal <name>.bin, the dtype is in <name>.json'''
+    path = Path(path)
+    header = json.loads(path.with_suffix('.json').read_text())
+    dtype = np.lib.format.descr_to_dtype(
+        [tuple(e) for e in header['descr']])
+    return np.fromfile(path, dtype=dtype)
+
+
+class EventRecorder(object):
+    '''
+    The recorder of the display events.
+
+    The fixed-size records are written into the preallocated ring buffer by the render loop,
+    it never allocates nor waits.
+    The journal thread appends the new records to <root>/events-<time>.bin,
+    the dtype and the kinds are in the .json next to it.
+    The recent records are queried by the sequence number or the time.
+    '''
+    capacity = 65536  # Records in the ring buffer
+    flush_interval = 0.5  # Seconds between the journal writes
+
+    def __init__(self, root: Path = None, capacity: int = None):
+        if capacity:
+            self.capacity = capacity
+        self.ring = np.zeros(self.capacity, dtype=EVENT_DTYPE)
+        # The number of the records, the next seq
+        self.count = 0
+
+        self.journal_path = None
+        if root is not None:
+            root = Path(root)
+            root.mkdir(parents=True, exist_ok=True)
+            name = datetime.now().strftime('events-%Y%m%d-%H%M%S')
+            self.journal_path = root.joinpath(f'{name}.bin')
+            self.journal_path.with_suffix('.json').write_text(json.dumps(dict(
+                descr=[list(e) for e in np.lib.format.dtype_to_descr(EVENT_DTYPE)],
+                kinds=EVENT_KINDS,
+                clock='perf_counter_ns')))
+            self.stopped = Event()
+            Thread(target=self._journal, daemon=True).start()
+            logger.debug(f'Journal events into {self.journal_path}')
+
+    def record(self, kind: str, label: str = '', frame: int = 0, passed: float = 0.0, t_ns: int = None) -> int:
+        '''
+        Record the event.
+
+        Returns:
+            - seq: The sequence number of the event.
+        '''
+        seq = self.count
+        self.ring[seq % self.capacity] = (
+            seq,
+            time.perf_counter_ns() if t_ns is None else t_ns,
+            frame,
+            EVENT_KINDS.index(kind),
+            str(label or '').encode()[:31],
+            passed)
+        # The record is published after it is written
+        self.count = seq + 1
+        return seq
+
+    def since(self, seq: int = 0) -> np.ndarray:
+        '''
+        Query the records since the seq (included).
+        The records overwritten by the ring buffer are missing.
+        '''
+        count = self.count
+        start = max(seq, count - self.capacity, 0)
+        if start >= count:
+            return self.ring[:0].copy()
+
+        idx = np.arange(start, count) % self.capacity
+        records = self.ring[idx]
+        # Drop the records overwritten during the copy
+        return records[records['seq'] == np.arange(start, count)]
+
+    def since_time(self, t_ns: int) -> np.ndarray:
+        '''Query the records since the perf_counter_ns (included)'''
+        records = self.since(0)
+        return records[records['t_ns'] >= t_ns]
+
+    def _journal(self):
+        written = 0
+        with open(self.journal_path, 'ab') as f:
+            while True:
+                # Flush the rest before the stop
+                stopped = self.stopped.wait(self.flush_interval)
+                count = self.count
+                if count - written > self.capacity:
+                    logger.warning(
+                        f'Lost {count - written - self.capacity} events of the journal')
+                records = self.since(written)
+                if len(records):
+                    f.write(records.tobytes())
+                    f.flush()
+                written = count
+                if stopped:
+                    break
+
+    def close(self):
+        if self.journal_path is not None:
+            self.stopped.set()
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
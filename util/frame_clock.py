@@ -0,0 +1,124 @@
+"""
+File: frame_clock.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Measure the refresh interval of the monitor, and detect the dropped frames
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import time
+import numpy as np
+
+from . import logger
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def measure_frame_interval(flip, n_frames: int = 120, n_warmup: int = 10, tolerance: float = 0.1, min_interval: float = 0.002) -> float:
+    '''
+    Measure the refresh interval by flipping the window, like the win.getActualFrameRate.
+
+    The intervals away from the median more than the tolerance (ratio) are rejected as the outliers,
+    e.g. the frames dropped by the scheduling.
+
+    Args:
+        - flip: The function to flip the window, it blocks until the vertical blank.
+        - n_frames: The intervals to measure.
+        - n_warmup: The flips before the measurement.
+        - tolerance: The ratio of the accepted deviation from the median.
+        - min_interval: Seconds, the shorter interval means the flip is not synchronized.
+
+    Returns:
+        - interval: Seconds, the mean of the accepted intervals, None if the measurement is not reliable.
+    '''
+    for _ in range(n_warmup):
+        flip()
+
+    t = np.empty(n_frames + 1, dtype=np.int64)
+    for i in range(n_frames + 1):
+        flip()
+        t[i] = time.perf_counter_ns()
+
+    dt = np.diff(t) / 1e9
+    median = np.median(dt)
+    accepted = dt[np.abs(dt - median) < tolerance * median]
+
+    if median < min_interval or len(accepted) < n_frames / 2:
+        logger.warning(
+            f'Failed to measure the frame interval, median: {median:.6f}, accepted: {len(accepted)}/{n_frames}')
+        return None
+
+    interval = float(accepted.mean())
+    logger.info(
+        f'Measured frame interval: {interval*1000:.4f} ms ({1/interval:.3f} Hz), std: {accepted.std()*1e6:.1f} us, rejected {n_frames - len(accepted)}/{n_frames}')
+    return interval
+
+
+class FrameClock(object):
+    '''
+    The clock of the frame-locked presentation.
+
+    The stimulus time of the frame is its index times the refresh interval,
+    the wall time is only used to detect the dropped frames:
+    the flip later than the drop_ratio intervals since the last flip has dropped the frames between them.
+    '''
+    interval = 1 / 60  # Seconds
+    drop_ratio = 1.5
+
+    def __init__(self, interval: float = None, drop_ratio: float = None):
+        if interval:
+            self.interval = interval
+        if drop_ratio:
+            self.drop_ratio = drop_ratio
+        self.interval_ns = self.interval * 1e9
+        self.last_ns = None
+        self.dropped = 0
+
+    def start(self):
+        '''Start counting the dropped frames of the block'''
+        self.last_ns = None
+        self.dropped = 0
+
+    def passed(self, frame: int) -> float:
+        '''Seconds, the stimulus time of the frame'''
+        return frame * self.interval
+
+    def tick(self, t_ns: int) -> int:
+        '''
+        Check the flip at the t_ns.
+
+        Returns:
+            - dropped: The frames dropped before the flip.
+        '''
+        dropped = 0
+        if self.last_ns is not None:
+            dt = t_ns - self.last_ns
+            if dt > self.drop_ratio * self.interval_ns:
+                dropped = int(round(dt / self.interval_ns)) - 1
+                self.dropped += dropped
+        self.last_ns = t_ns
+        return dropped
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
@@ -0,0 +1,213 @@
+"""
+File: frame_profiler.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Profile the timing of every frame, and summarize the presentation quality of the trials
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import json
+import time
+import numpy as np
+
+from queue import Queue
+from pathlib import Path
+from datetime import datetime
+from threading import Thread
+from collections import deque
+
+from . import logger
+
+# The phases of the frame, the laps are attributed to them
+DRAW, UPLOAD, FLIP = 0, 1, 2
+PHASES = ['draw', 'upload', 'flip']
+
+FRAME_DTYPE = np.dtype([
+    ('frame', '<i8'),  # The frame index of the display
+    ('t_ns', '<i8'),  # The perf_counter_ns when the flip returns
+    ('interval', '<f4'),  # Milliseconds since the last flip, 0 for the first frame
+    ('draw', '<f4'),  # Milliseconds
+    ('upload', '<f4'),  # Milliseconds
+    ('flip', '<f4'),  # Milliseconds
+    ('dropped', '<u2'),  # The frames dropped before the flip
+])
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def quantiles(values: np.ndarray) -> dict:
+    '''The p50, p95, p99 and max of the values, rounded to the microsecond'''
+    if len(values) == 0:
+        return dict(p50=0, p95=0, p99=0, max=0)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]).tolist()
+    return dict(p50=round(p50, 3), p95=round(p95, 3), p99=round(p99, 3), max=round(float(values.max()), 3))
+
+
+def summarize_frames(frames: np.ndarray) -> dict:
+    '''Summarize the FRAME_DTYPE records'''
+    # The first frame of the block has no interval
+    intervals = frames['interval'][frames['interval'] > 0]
+    return dict(
+        frames=len(frames),
+        intervalMs=quantiles(intervals),
+        **{f'{e}Ms': quantiles(frames[e]) for e in PHASES},
+        dropped=int(frames['dropped'].sum()))
+
+
+class FrameProfiler(object):
+    '''
+    The profiler of the frames in the render loop.
+
+    The render loop calls lap(phase) after each phase and end(...) after the flip,
+    the time since the last lap is attributed to the phase,
+    and the frame is written into the preallocated ring buffer.
+    The trial is summarized when it ends, the summaries are kept for the status,
+    and the journal thread appends them into <root>/frames-<time>.jsonl,
+    the frames of the trial into <root>/frames-<time>.bin, its dtype is in the .json next to it.
+    '''
+    capacity = 8192  # Frames in the ring buffer
+    trials_limit = 64  # The recent trial summaries
+
+    def __init__(self, root: Path = None, capacity: int = None):
+        if capacity:
+            self.capacity = capacity
+        self.ring = np.zeros(self.capacity, dtype=FRAME_DTYPE)
+        self.count = 0
+        self.laps = [0, 0, 0]
+        self.last_lap_ns = time.perf_counter_ns()
+        self.last_flip_ns = None
+
+        self.trial = None
+        self.trial_start = 0
+        self.trials = deque(maxlen=self.trials_limit)
+
+        self.root = None if root is None else Path(root)
+        self.queue = Queue()
+        if self.root is not None:
+            Thread(target=self._journal, daemon=True).start()
+
+    def start_block(self):
+        '''The first frame of the block has no interval'''
+        self.last_flip_ns = None
+        self.laps = [0, 0, 0]
+        self.last_lap_ns = time.perf_counter_ns()
+
+    def lap(self, phase: int, t_ns: int = None):
+        '''Attribute the time since the last lap (until the t_ns, or now) to the phase'''
+        t = time.perf_counter_ns() if t_ns is None else t_ns
+        self.laps[phase] += t - self.last_lap_ns
+        self.last_lap_ns = t
+
+    def end(self, frame: int, t_ns: int, dropped: int = 0):
+        '''
+        Record the frame flipped at the t_ns.
+
+        Args:
+            - frame: The frame index.
+            - t_ns: The perf_counter_ns when the flip returns.
+            - dropped: The frames dropped before the flip.
+        '''
+        draw, upload, flip = self.laps
+        self.ring[self.count % self.capacity] = (
+            frame, t_ns,
+            0 if self.last_flip_ns is None else (
+                t_ns - self.last_flip_ns) / 1e6,
+            draw / 1e6, upload / 1e6, flip / 1e6, dropped)
+        self.count += 1
+        self.last_flip_ns = t_ns
+        self.laps = [0, 0, 0]
+        self.last_lap_ns = time.perf_counter_ns()
+
+    def frames_since(self, start: int) -> np.ndarray:
+        '''The frames since the count of start, the overwritten frames are missing'''
+        count = self.count
+        start = max(start, count - self.capacity, 0)
+        return self.ring[np.arange(start, count) % self.capacity]
+
+    def recent(self, n: int = 600) -> dict:
+        '''Summarize the recent n frames'''
+        return summarize_frames(self.frames_since(self.count - n))
+
+    def start_trial(self, **trial):
+        '''Start the trial, the kwargs are kept in its summary'''
+        self.end_trial()
+        self.trial = trial
+        self.trial_start = self.count
+
+    def end_trial(self) -> dict:
+        '''
+        End the trial and summarize it.
+
+        Returns:
+            - summary: The summary, None if no trial is running.
+        '''
+        if self.trial is None:
+            return None
+
+        frames = self.frames_since(self.trial_start)
+        summary = dict(self.trial, **summarize_frames(frames))
+        if self.count - self.trial_start > self.capacity:
+            summary['overwritten'] = self.count - \
+                self.trial_start - self.capacity
+        self.trial = None
+
+        self.trials.append(summary)
+        if self.root is not None:
+            self.queue.put((summary, frames))
+        if summary['dropped']:
+            logger.warning(f'Dropped frames in the trial: {summary}')
+        return summary
+
+    def _journal(self):
+        name = datetime.now().strftime('frames-%Y%m%d-%H%M%S')
+        path = self.root.joinpath(f'{name}.bin')
+        created = False
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            # The files are created with the first trial
+            if not created:
+                self.root.mkdir(parents=True, exist_ok=True)
+                path.with_suffix('.json').write_text(json.dumps(dict(
+                    descr=[list(e) for e in np.lib.format.dtype_to_descr(FRAME_DTYPE)],
+                    phases=PHASES,
+                    clock='perf_counter_ns')))
+                logger.debug(f'Journal frames into {path}')
+                created = True
+
+            summary, frames = item
+            with open(path, 'ab') as f:
+                f.write(frames.tobytes())
+            with open(path.with_suffix('.jsonl'), 'a') as f:
+                f.write(json.dumps(summary) + '\n')
+
+    def close(self):
+        self.end_trial()
+        if self.root is not None:
+            self.queue.put(None)
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
@@ -0,0 +1,133 @@
+"""
+File: handoff.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Handoff between the websocket thread and the render loop
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+from threading import Lock
+from collections import deque
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+class TaskQueue(object):
+    '''
+    The bounded FIFO queue of the tasks.
+
+    The put never blocks, it returns False when the queue is full,
+    so the sender is told to wait (backpressure).
+    The get never blocks, it returns None when the queue is empty.
+    '''
+    maxsize = 16
+
+    def __init__(self, maxsize: int = None):
+        if maxsize:
+            self.maxsize = maxsize
+        self.items = deque()
+        self.lock = Lock()
+
+    def put(self, item) -> bool:
+        with self.lock:
+            if len(self.items) >= self.maxsize:
+                return False
+            self.items.append(item)
+            return True
+
+    def get(self):
+        # The deque.popleft is atomic
+        try:
+            return self.items.popleft()
+        except IndexError:
+            return None
+
+    def __len__(self):
+        return len(self.items)
+
+
+class EventQueue(object):
+    '''
+    The FIFO queue of the events from the render loop.
+    The oldest events are dropped when the queue is full.
+    '''
+    maxlen = 1024
+
+    def __init__(self, maxlen: int = None):
+        if maxlen:
+            self.maxlen = maxlen
+        self.items = deque(maxlen=self.maxlen)
+
+    def put(self, item):
+        self.items.append(item)
+
+    def get(self):
+        try:
+            return self.items.popleft()
+        except IndexError:
+            return None
+
+    def __len__(self):
+        return len(self.items)
+
+
+class StatusSnapshot(object):
+    '''
+    The status written by the render loop and read by the other threads.
+
+    The writer builds the new dict and swaps the reference,
+    so the reader always gets the complete status of one frame.
+    '''
+
+    def __init__(self, **items):
+        self._status = dict(items)
+
+    def publish(self, **items):
+        self._status = dict(self._status, **items)
+
+    def get(self) -> dict:
+        return self._status
+
+
+class Mailbox(object):
+    '''
+    The latest values posted by the other threads,
+    they are taken and applied by the render loop between the frames.
+    '''
+
+    def __init__(self):
+        self.items = {}
+        self.lock = Lock()
+
+    def post(self, **items):
+        with self.lock:
+            self.items.update(items)
+
+    def take(self) -> dict:
+        with self.lock:
+            items, self.items = self.items, {}
+        return items
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
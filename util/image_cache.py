@@ -0,0 +1,123 @@
+"""
+File: image_cache.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Content-addressed cache of the background images on the display
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import hashlib
+import numpy as np
+
+from io import BytesIO
+from PIL import Image
+from threading import RLock
+from collections import OrderedDict
+
+from . import logger
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def image_hash(data) -> str:
+    '''The content hash of the image bytes'''
+    return hashlib.sha1(data).hexdigest()
+
+
+class ImageCache(object):
+    '''
+    The LRU cache of the background images.
+
+    The raw bytes are keyed by their hash,
+    and the decoded RGB arrays are keyed by (hash, resolution).
+    The entries are evicted when the total size exceeds the max_bytes.
+    '''
+    max_bytes = 512 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = None):
+        if max_bytes:
+            self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.nbytes = 0
+        self.lock = RLock()
+
+    def _get(self, key):
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                return self.items[key]
+            return None
+
+    def _put(self, key, value, size: int):
+        with self.lock:
+            if key in self.items:
+                self.nbytes -= self.items.pop(key)[1]
+            self.items[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and len(self.items) > 1:
+                _, (_, s) = self.items.popitem(last=False)
+                self.nbytes -= s
+
+    def has(self, h: str) -> bool:
+        with self.lock:
+            return ('raw', h) in self.items
+
+    def put(self, data) -> str:
+        '''
+        Store the image bytes.
+
+        Returns:
+            - h: The hash of the bytes.
+        '''
+        data = bytes(data)
+        h = image_hash(data)
+        if not self.has(h):
+            self._put(('raw', h), data, len(data))
+            logger.debug(f'Cached image {h[:8]} ({len(data)} bytes)')
+        return h
+
+    def get_rgb(self, h: str, resolution: tuple) -> np.ndarray:
+        '''
+        Get the (height, width, 3) RGB array of the image resized to the resolution.
+        The image is decoded on the first request of the resolution.
+
+        Raises:
+            - KeyError: The image is not cached.
+        '''
+        resolution = tuple(int(e) for e in resolution)
+        if got := self._get(('rgb', h, resolution)):
+            return got[0]
+
+        if not (got := self._get(('raw', h))):
+            raise KeyError(h)
+
+        img = Image.open(BytesIO(got[0])).convert('RGB').resize(resolution)
+        rgb = np.asarray(img)
+        rgb.flags.writeable = False
+        self._put(('rgb', h, resolution), rgb, rgb.nbytes)
+        logger.debug(f'Decoded image {h[:8]} into {resolution}')
+        return rgb
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
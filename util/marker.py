@@ -0,0 +1,175 @@
+"""
+File: marker.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Publish the stimulus markers through the local UDP socket right after the flip
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import os
+import sys
+import time
+import socket
+import struct
+import threading
+import numpy as np
+
+from collections import deque
+
+from . import logger
+from .event_recorder import EVENT_KINDS
+
+# The packet is the magic, seq, perf_counter_ns of the flip, frame index, kind and label
+MARKER = struct.Struct('<4sIqQB15s')
+MARKER_MAGIC = b'SSMK'
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def unpack_marker(packet) -> dict:
+    _, seq, t_ns, frame, kind, label = MARKER.unpack(packet)
+    return dict(seq=seq, t_ns=t_ns, frame=frame, kind=EVENT_KINDS[kind],
+                label=label.rstrip(b'\x00').decode(errors='replace'))
+
+
+class MarkerPublisher(object):
+    '''
+    The publisher of the markers.
+
+    The render loop packs the marker into the preallocated packet and appends it to the deque,
+    the deque.append and deque.popleft are atomic, so the render loop never waits.
+    The sender thread (raised priority if allowed) sends the packets by UDP.
+    '''
+    host = '127.0.0.1'
+    port = 23340
+    slots = 256  # Preallocated packets
+
+    def __init__(self, host: str = None, port: int = None):
+        if host:
+            self.host = host
+        if port:
+            self.port = port
+        self.address = (self.host, self.port)
+        self.packets = [bytearray(MARKER.size) for _ in range(self.slots)]
+        self.queue = deque()
+        self.wakeup = threading.Event()
+        self.seq = 0
+        self.sent = 0
+        self.dropped = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        threading.Thread(target=self._run, daemon=True).start()
+        logger.debug(f'Publish markers to {self.address}')
+
+    def fire(self, kind: str, label: str = '', frame: int = 0, t_ns: int = None) -> int:
+        '''
+        Fire the marker, it is called right after the flip.
+
+        Returns:
+            - seq: The sequence number of the marker.
+        '''
+        t_ns = time.perf_counter_ns() if t_ns is None else t_ns
+        seq = self.seq
+        self.seq += 1
+
+        # The slot is reused after the slots markers, they are sent long before
+        packet = self.packets[seq % self.slots]
+        MARKER.pack_into(
+            packet, 0, MARKER_MAGIC, seq & 0xFFFFFFFF, t_ns, frame,
+            EVENT_KINDS.index(kind), str(label or '').encode()[:15])
+        self.queue.append(packet)
+        self.wakeup.set()
+        return seq
+
+    def _raise_priority(self):
+        try:
+            if sys.platform == 'win32':
+                import ctypes
+                ctypes.windll.kernel32.SetThreadPriority(
+                    ctypes.windll.kernel32.GetCurrentThread(), 15)  # THREAD_PRIORITY_TIME_CRITICAL
+            else:
+                os.setpriority(os.PRIO_PROCESS,
+                               threading.get_native_id(), -10)
+        except (OSError, AttributeError) as error:
+            logger.debug(f'Keep the priority of the marker thread: {error}')
+
+    def _run(self):
+        self._raise_priority()
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            while True:
+                try:
+                    packet = self.queue.popleft()
+                except IndexError:
+                    break
+                try:
+                    self.sock.sendto(packet, self.address)
+                    self.sent += 1
+                except OSError as error:
+                    self.dropped += 1
+                    logger.warning(f'Failed to send the marker: {error}')
+
+
+class MarkerReceiver(object):
+    '''
+    The local receiver of the markers, for the benchmark.
+    The latency is the perf_counter_ns on receive minus the t_ns of the marker.
+    '''
+
+    def __init__(self, host: str = MarkerPublisher.host, port: int = MarkerPublisher.port):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.latencies = []
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            packet = self.sock.recv(MARKER.size)
+            self.latencies.append(time.perf_counter_ns() -
+                                  MARKER.unpack(packet)[2])
+
+
+def benchmark(n: int = 600, frame_interval: float = 1 / 60, port: int = 23349) -> dict:
+    '''
+    Measure the flip-to-marker latency (microseconds) against the local receiver.
+    The flip is emulated by sleeping for the frame interval.
+    '''
+    receiver = MarkerReceiver(port=port)
+    publisher = MarkerPublisher(port=port)
+    for i in range(n):
+        time.sleep(frame_interval)
+        publisher.fire('displayBody', frame=i)
+    time.sleep(0.1)
+
+    latencies = np.array(receiver.latencies) / 1e3
+    return dict(
+        fired=n, received=len(latencies),
+        **{f'p{q}': round(float(np.percentile(latencies, q)), 1) for q in (50, 95, 99)},
+        max=round(float(latencies.max()), 1))
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+if __name__ == '__main__':
+    # python -m util.marker
+    print(benchmark())
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
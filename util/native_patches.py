@@ -0,0 +1,108 @@
+"""
+File: native_patches.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Draw the patches as the native psychopy stimuli
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import numpy as np
+
+from psychopy import visual
+
+from . import logger
+
+# The gray level (0-255) in the psychopy rgb space (-1-1)
+GRAY_LUT = np.repeat(np.linspace(-1, 1, 256)[:, np.newaxis], 3, axis=1)
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+class NativePatches(object):
+    '''
+    The patches drawn by the GPU over the static background.
+
+    The small layout is one visual.Rect or visual.Circle per patch,
+    only the patches whose gray level changes are updated.
+    The large layout is one visual.ElementArrayStim, its colors array is updated every frame.
+    The stims are created in the render thread, since they need the GL context.
+    '''
+    element_limit = 16  # Patches, the larger layout uses the ElementArrayStim
+
+    def __init__(self, win: visual.Window, size: tuple, patches_xy: list, patch_shape: str, element_limit: int = None):
+        if element_limit:
+            self.element_limit = element_limit
+
+        # The image coordinates (top left, y down) are converted into the pix units (center, y up)
+        width, height = size
+        xy = np.array(patches_xy, dtype=np.float64).reshape(-1, 4)
+        pos = np.stack([
+            (xy[:, 0] + xy[:, 2]) / 2 - width / 2,
+            height / 2 - (xy[:, 1] + xy[:, 3]) / 2], axis=1)
+        sizes = np.stack([xy[:, 2] - xy[:, 0], xy[:, 3] - xy[:, 1]], axis=1)
+
+        self.last = None
+        self.stims = []
+        self.elements = None
+
+        if patch_shape not in ('rectangle', 'ellipse') or len(xy) == 0:
+            return
+
+        if len(xy) > self.element_limit:
+            self.elements = visual.ElementArrayStim(
+                win, units='pix', nElements=len(xy), xys=pos, sizes=sizes,
+                elementTex=None, elementMask='circle' if patch_shape == 'ellipse' else None,
+                sfs=0, colors=GRAY_LUT[np.zeros(len(xy), dtype=np.uint8)], colorSpace='rgb')
+            self.stims = [self.elements]
+        else:
+            for p, s in zip(pos.tolist(), sizes.tolist()):
+                if patch_shape == 'ellipse':
+                    stim = visual.Circle(
+                        win, units='pix', radius=0.5, size=s, pos=p, edges=64, lineWidth=0)
+                else:
+                    stim = visual.Rect(
+                        win, units='pix', width=s[0], height=s[1], pos=p, lineWidth=0)
+                self.stims.append(stim)
+
+        logger.debug(
+            f'Created {len(xy)} native patches ({"elements" if self.elements else "shapes"})')
+
+    def update(self, row: np.ndarray):
+        '''Set the gray levels of the patches'''
+        if self.elements is not None:
+            self.elements.colors = GRAY_LUT[row]
+            return
+
+        changed = range(len(row)) if self.last is None else np.flatnonzero(
+            row != self.last).tolist()
+        for i in changed:
+            self.stims[i].fillColor = GRAY_LUT[row[i]]
+        self.last = row.copy()
+
+    def set_auto_draw(self, flag: bool):
+        for stim in self.stims:
+            stim.setAutoDraw(flag)
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
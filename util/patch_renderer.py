@@ -0,0 +1,124 @@
+"""
+File: patch_renderer.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Render the patches by the color lookup table of the label map
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import numpy as np
+
+from PIL import Image, ImageDraw
+
+from . import logger
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def rasterize_labels(size: tuple, patches_xy: list, patch_shape: str) -> np.ndarray:
+    '''
+    Rasterize the patches into the label map.
+
+    Args:
+        - size: The (width, height) of the screen.
+        - patches_xy: The [x0, y0, x1, y1] of the patches.
+        - patch_shape: 'rectangle' or 'ellipse', the patches are not drawn otherwise.
+
+    Returns:
+        - labels: The (height, width) uint16 map, 0 is the background and i+1 is the ith patch.
+                  The later patch covers the earlier one, as they are drawn.
+    '''
+    width, height = size
+    labels = np.zeros((height, width), dtype=np.uint16)
+    if patch_shape not in ('rectangle', 'ellipse'):
+        return labels
+
+    for i, (x0, y0, x1, y1) in enumerate(patches_xy):
+        # Draw the patch in its bounding box only
+        left, top = max(int(np.floor(x0)), 0), max(int(np.floor(y0)), 0)
+        right, bottom = min(int(np.ceil(x1)) + 1, width), min(int(np.ceil(y1)) + 1, height)
+        if right <= left or bottom <= top:
+            continue
+
+        mask = Image.new('1', (right - left, bottom - top))
+        getattr(ImageDraw.Draw(mask), patch_shape)(
+            xy=[x0 - left, y0 - top, x1 - left, y1 - top], fill=1)
+        labels[top:bottom, left:right][np.asarray(mask)] = i + 1
+
+    return labels
+
+
+class PaletteRenderer(object):
+    '''
+    The renderer of the patches by the palette.
+
+    The label map is rasterized once, and only the pixels of the patches are kept as the flat indices.
+    Every frame fills them with lut[label], where lut is the gray levels of the patches,
+    so the cost is the pixels of the patches, the background is never touched.
+    The pixels are grouped by the patch, so the changed patches are painted alone.
+    The frame is the RGBA array shared by the PIL image, it is never copied.
+    '''
+
+    def __init__(self, background: Image.Image, patches_xy: list, patch_shape: str):
+        width, height = background.size
+        self.frame = np.array(background.convert('RGBA'))
+        self.img = Image.frombuffer(
+            'RGBA', (width, height), self.frame, 'raw', 'RGBA', 0, 1)
+
+        labels = rasterize_labels((width, height), patches_xy, patch_shape)
+        index = np.flatnonzero(labels)
+        order = np.argsort(labels.ravel()[index], kind='stable')
+        self.index = index[order]
+        # The label of every patch pixel, 0 is the first patch
+        self.label = labels.ravel()[self.index] - 1
+        # The pixels of the ith patch are index[bounds[i]:bounds[i+1]]
+        self.bounds = np.searchsorted(
+            self.label, np.arange(len(patches_xy) + 1))
+        self.pixels = self.frame.reshape(-1, 4)
+        self.lut = np.full((len(patches_xy), 4), 255, dtype=np.uint8)
+        logger.debug(
+            f'Rasterized {len(patches_xy)} patches, {len(self.index)} pixels')
+
+    def update(self, row: np.ndarray, changed: np.ndarray = None) -> Image.Image:
+        '''
+        Paint the patches with the gray levels of the row.
+
+        Args:
+            - row: The gray levels of the patches.
+            - changed: The indices of the patches to paint, None for all of them.
+
+        Returns:
+            - img: The image of the frame.
+        '''
+        self.lut[:, :3] = row[:, np.newaxis]
+        if changed is None:
+            self.pixels[self.index] = self.lut[self.label]
+            return self.img
+
+        for i in changed.tolist():
+            self.pixels[self.index[self.bounds[i]:self.bounds[i+1]]] = self.lut[i]
+        return self.img
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
@@ -0,0 +1,97 @@
+"""
+File: preview.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Decimated time series preview for the browser
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import base64
+import numpy as np
+import pandas as pd
+
+from . import logger
+from .stimulus import MergedTimeSeries, float2gray
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def minmax_decimate(values: np.ndarray, buckets: int):
+    '''
+    Decimate the (n_samples, n_patches) values into the buckets along the time.
+    The min and max of every bucket are kept, so the peaks survive.
+
+    Returns:
+        - starts: The first sample of every bucket.
+        - lo: The (n_buckets, n_patches) min values.
+        - hi: The (n_buckets, n_patches) max values.
+    '''
+    n = len(values)
+    if n <= buckets:
+        return np.arange(n), values, values
+    starts = np.unique(np.linspace(0, n, buckets + 1).astype(int)[:-1])
+    lo = np.minimum.reduceat(values, starts, axis=0)
+    hi = np.maximum.reduceat(values, starts, axis=0)
+    return starts, lo, hi
+
+
+def _b64(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode()
+
+
+def build_preview(merged: MergedTimeSeries, df_pairs: pd.DataFrame, df_corr: pd.DataFrame = None, buckets: int = 800) -> dict:
+    '''
+    Build the compact preview payload.
+
+    The values are quantized into the uint8 gray levels as the display does,
+    and the (n_patches, n_buckets) matrices are sent as base64 bytes.
+    The correlation is the dense uint8 matrix if provided, otherwise the top-k pairs.
+    '''
+    starts, lo, hi = minmax_decimate(merged.values, buckets)
+    payload = dict(
+        names=merged.names,
+        types=np.where(merged.from_csv, 'ts', 'compute').tolist(),
+        interval=merged.interval,
+        nSamples=len(merged.values),
+        starts=_b64(starts.astype(np.uint32)),
+        lo=_b64(float2gray(lo).T),
+        hi=_b64(float2gray(hi).T),
+    )
+
+    if df_corr is not None:
+        payload['corr'] = _b64(float2gray(df_corr.to_numpy()))
+    else:
+        names = {e: i for i, e in enumerate(merged.names)}
+        payload['pairs'] = dict(
+            name=df_pairs['name'].map(names).tolist(),
+            other=df_pairs['other'].map(names).tolist(),
+            corr=np.round(df_pairs['corr'].to_numpy(), 3).tolist(),
+            spectral=np.round(df_pairs['spectral'].to_numpy(), 3).tolist())
+
+    logger.debug(
+        f'Built preview: {len(merged.names)} patches, {len(starts)} buckets')
+    return payload
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
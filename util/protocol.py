@@ -0,0 +1,175 @@
+"""
+File: protocol.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Wire protocol between the control server and the display
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import json
+import struct
+import numpy as np
+
+# The envelope is the magic and the request id,
+# the response carries the id of its request
+ENVELOPE = struct.Struct('<4sQ')
+ENVELOPE_MAGIC = b'SSV1'
+
+# The message is the magic, the length of the JSON header, the header and the buffers.
+# The buffers are aligned so the arrays are wrapped in place
+MESSAGE = struct.Struct('<4sI')
+MESSAGE_MAGIC = b'SSVM'
+ALIGNMENT = 64
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def pack_envelope(rid: int, payload) -> bytes:
+    '''Wrap the payload (bytes or str) with the request id'''
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return ENVELOPE.pack(ENVELOPE_MAGIC, rid) + payload
+
+
+def unpack_envelope(message):
+    '''
+    Unwrap the message.
+
+    Returns:
+        - rid: The request id, None if the message is not wrapped.
+        - payload: The payload as memoryview, or the message itself if not wrapped.
+    '''
+    if isinstance(message, (bytes, bytearray)) and message[:4] == ENVELOPE_MAGIC and len(message) >= ENVELOPE.size:
+        _, rid = ENVELOPE.unpack_from(message)
+        return rid, memoryview(message)[ENVELOPE.size:]
+    return None, message
+
+
+def _descr(dtype: np.dtype):
+    descr = np.lib.format.dtype_to_descr(dtype)
+    return descr if isinstance(descr, str) else [list(e) for e in descr]
+
+
+def _dtype(descr) -> np.dtype:
+    if isinstance(descr, str):
+        return np.dtype(descr)
+    return np.lib.format.descr_to_dtype([tuple(e) for e in descr])
+
+
+def encode_message(meta: dict, arrays: dict = None, blobs: dict = None) -> bytes:
+    '''
+    Encode the message.
+
+    Args:
+        - meta: The JSON-able items.
+        - arrays: The NumPy arrays without objects, they are sent as the raw contiguous buffers.
+        - blobs: The raw bytes.
+
+    Returns:
+        - message: The encoded bytes.
+    '''
+    buffers = []
+    offset = 0
+
+    def place(buf) -> dict:
+        nonlocal offset
+        offset += -offset % ALIGNMENT
+        item = dict(offset=offset, nbytes=len(buf))
+        buffers.append((offset, buf))
+        offset += len(buf)
+        return item
+
+    header = dict(meta=meta, arrays={}, blobs={})
+    for name, array in (arrays or {}).items():
+        array = np.ascontiguousarray(array)
+        header['arrays'][name] = dict(
+            place(array.reshape(-1).view(np.uint8)),
+            descr=_descr(array.dtype), shape=list(array.shape))
+    for name, blob in (blobs or {}).items():
+        header['blobs'][name] = place(np.frombuffer(blob, dtype=np.uint8))
+
+    header = json.dumps(header).encode()
+    start = MESSAGE.size + len(header)
+    start += -start % ALIGNMENT
+
+    message = bytearray(start + offset)
+    MESSAGE.pack_into(message, 0, MESSAGE_MAGIC, len(header))
+    message[MESSAGE.size:MESSAGE.size + len(header)] = header
+    target = np.frombuffer(message, dtype=np.uint8)
+    for o, buf in buffers:
+        target[start + o:start + o + len(buf)] = buf
+    return bytes(message)
+
+
+def decode_message(message):
+    '''
+    Decode the message without copying the buffers.
+
+    Returns:
+        - meta: The JSON items.
+        - arrays: The read-only arrays wrapping the message.
+        - blobs: The memoryviews of the message.
+
+    Raises:
+        - ValueError: The message is invalid, e.g. the text message or the malformed header.
+    '''
+    if isinstance(message, str):
+        raise ValueError('Invalid message, the text message is not supported')
+    try:
+        message = memoryview(message).cast('B')
+    except TypeError as error:
+        raise ValueError(f'Invalid message, {error}')
+    if len(message) < MESSAGE.size or bytes(message[:4]) != MESSAGE_MAGIC:
+        raise ValueError('Invalid message')
+
+    _, length = MESSAGE.unpack_from(message)
+    header = json.loads(bytes(message[MESSAGE.size:MESSAGE.size + length]))
+    start = MESSAGE.size + length
+    start += -start % ALIGNMENT
+
+    try:
+        meta = header['meta']
+        arrays = {}
+        for name, e in header['arrays'].items():
+            dtype = _dtype(e['descr'])
+            count = e['nbytes'] // dtype.itemsize if dtype.itemsize else 0
+            arrays[name] = np.frombuffer(
+                message, dtype=dtype, count=count, offset=start + e['offset']).reshape(e['shape'])
+
+        blobs = {}
+        for name, e in header['blobs'].items():
+            end = start + e['offset'] + e['nbytes']
+            if end > len(message):
+                raise ValueError(f'Blob {name} is out of the message')
+            blobs[name] = message[start + e['offset']:end]
+    except (KeyError, TypeError, AttributeError) as error:
+        raise ValueError(f'Invalid message header, {error!r}')
+
+    if not isinstance(meta, dict):
+        raise ValueError('Invalid message header, meta is not the dict')
+
+    return meta, arrays, blobs
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
@@ -18,65 +18,100 @@ Functions:
 
 # %% ---- 2024-06-04 ------------------------
 # Requirements and constants
-import time
+import os
 import random
-import numpy as np
 import pandas as pd
 
 from datetime import datetime
 from pathlib import Path
+from threading import RLock
+from collections import OrderedDict
 
 from . import logger
+from .compile_cache import CompileCache
+from .design import parse_design, format_design, dumps_design, loads_design
+from .stimulus import MergedTimeSeries, StimulusSpec
+from .timeseries_store import TimeSeriesStore
 
 
 # %% ---- 2024-06-04 ------------------------
 # Function and class
-def txt2df(txt: str) -> pd.DataFrame:
-    rows = txt.split(";")
-    rows = [[e.strip() for e in row.split(',')] for row in rows]
-    columns = ['i', 'name', 'x', "y", "w", "h", 'omega', 'phi']
-    df = pd.DataFrame(rows, columns=columns)
-    for k in ['x', "y", "w", "h", 'omega', 'phi']:
-        df[k] = df[k].map(float)
-    return df
-
-
 def df2txt(df: pd.DataFrame) -> str:
-    values = df.values
-    txt = ';\n'.join(','.join(f'{e}' for e in row) for row in values)
-    return txt
+    return format_design(df)
 
 
 class SessionManager(object):
-    dfs = {}
+    '''
+    The saved designs in the root directory.
+
+    The index maps the name to the (path, mtime, size) of the file,
+    the contents are loaded on demand and kept in the LRU cache.
+    The designs are saved as .csv, or as the compact binary .npy if the name says so.
+    '''
+    index = {}
+    suffixes = ('.csv', '.npy')
+    cache_size = 32  # Designs kept in memory
 
     def __init__(self, root: Path):
         self.root = root
         root.mkdir(parents=True, exist_ok=True)
+        self.cache = OrderedDict()
+        self.lock = RLock()
         self.refresh()
         logger.info(f'Initialized with {root}')
 
+    @staticmethod
+    def _check_name(name: str):
+        '''
+        The name is the file in the root, not a path.
+
+        Raises:
+            - ValueError: The name is empty or has the path separators.
+        '''
+        if not name or '/' in name or '\\' in name or '..' in name:
+            raise ValueError(f'Invalid session name: {name}')
+
+    def _stat(self, path: Path):
+        st = path.stat()
+        return (path, st.st_mtime_ns, st.st_size)
+
     def refresh(self):
-        dfs = {
-            e.name: pd.read_csv(e, index_col=None)
-            for e in self.root.iterdir()
-            if e.is_file() and e.name.endswith('.csv')}
-        self.dfs = dfs
-        logger.debug(f'Got sessions {len(dfs)}')
-        return dfs
+        '''
+        Scan the root directory without reading the files.
+        The cached contents of the changed or deleted files are dropped.
+        '''
+        index = {}
+        with os.scandir(self.root) as it:
+            for e in it:
+                if e.is_file() and e.name.endswith(self.suffixes):
+                    st = e.stat()
+                    index[e.name] = (Path(e.path), st.st_mtime_ns, st.st_size)
+
+        with self.lock:
+            for name in [k for k, v in self.cache.items() if index.get(k) != v[0]]:
+                self.cache.pop(name)
+            self.index = index
+
+        logger.debug(f'Got sessions {len(index)}')
+        return index
 
     def save(self, name: str, txt: str):
         name = name.strip()
         try:
-            df = txt2df(txt)
+            design = parse_design(txt)
 
             if not name:
                 d = datetime.strftime(datetime.now(), '%Y%m%d-%H%M%S')
-                name = f'{d}-{len(df)}-{random.random():0.8f}'
-            if not name.endswith('.csv'):
+                name = f'{d}-{len(design)}-{random.random():0.8f}'
+            if not name.endswith(self.suffixes):
                 name += '.csv'
+            self._check_name(name)
 
-            df.to_csv(self.root.joinpath(name), index=False)
+            path = self.root.joinpath(name)
+            if name.endswith('.npy'):
+                path.write_bytes(dumps_design(design))
+            else:
+                pd.DataFrame(design).to_csv(path, index=False)
 
             logger.debug(f'Saved new session {name}')
         except Exception as e:
@@ -84,69 +119,99 @@ class SessionManager(object):
 
     def get_by_name(self, name: str):
         name = name.strip()
-        if not name.endswith('.csv'):
+        if not name.endswith(self.suffixes):
             name += '.csv'
 
         try:
-            df = self.dfs[name]
-            return df2txt(df)
+            self._check_name(name)
+
+            # Only the files in the index are read, the new file is found by the rescan
+            entry = self.index.get(name) or self.refresh().get(name)
+            if entry is None:
+                logger.error(f'Unknown session {name}')
+                return None
+            key = self._stat(entry[0])
+
+            with self.lock:
+                if name in self.cache and self.cache[name][0] == key:
+                    self.cache.move_to_end(name)
+                    return self.cache[name][1]
+
+            if name.endswith('.npy'):
+                txt = format_design(loads_design(key[0].read_bytes()))
+            else:
+                txt = df2txt(pd.read_csv(key[0], index_col=None))
+
+            with self.lock:
+                self.cache[name] = (key, txt)
+                self.cache.move_to_end(name)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+            logger.debug(f'Loaded session {name}')
+            return txt
         except Exception as e:
             logger.error(f'Failed to get {name}: {e}')
 
 
 class TimeSeriesManager(object):
-    def __init__(self, root: Path):
+    '''
+    The time series libraries.
+    The compiled designs are kept in the cache keyed by the content,
+    the key includes the library version so the changed library invalidates them.
+    '''
+
+    def __init__(self, root: Path, cache: CompileCache = None):
         self.root = root
+        self.stores = {}
+        self.cache = cache or CompileCache()
         logger.info(f'Initialized with {root}')
 
+    def get_store(self, name: str = 'ts') -> TimeSeriesStore:
+        name = name.strip()
+        if name.endswith('.csv'):
+            name = name[:-4]
+        if name not in self.stores:
+            self.stores[name] = TimeSeriesStore(self.root, name)
+        return self.stores[name].open()
+
     def get_by_name(self, name: str = 'ts') -> pd.DataFrame:
-        if not name.endswith('.csv'):
-            name += '.csv'
-        path = self.root.joinpath(name)
-        return pd.read_csv(path, index_col=0)
+        return self.get_store(name).to_df()
 
-    def merge_with_txt(self, txt: str, body_length) -> pd.DataFrame:
-        df1 = txt2df(txt)
-        df2 = self.get_by_name()
+    def compile_txt(self, txt: str):
+        '''
+        Compile the design text.
 
-        # How many points are required
-        # Assume sampling interval is 0.01 seconds
+        Returns:
+            - design: The structured array of the design.
+            - spec: The StimulusSpec of the design.
+        '''
+        store = self.get_store()
+        key = self.cache.make_key('design', txt, store.version)
+
+        def compile():
+            design = parse_design(txt)
+            # Assume sampling interval is 0.01 seconds
+            return design, StimulusSpec.from_design(design, store, 0.01)
+
+        return self.cache.get_or_compute(key, compile)
+
+    def merge_with_txt(self, txt: str, body_length) -> MergedTimeSeries:
+        '''The time series of the trial body'''
         body_length = float(body_length)
-        n = int(body_length / 0.01)
-        seconds = np.array([i*0.01 for i in range(n)])
-
-        dfs = []
-        for _, se in df1.iterrows():
-            name = se['name']
-            if name in df2.columns:
-                value = df2[name].to_numpy().squeeze()
-                repeats = np.max([1, int(n/len(value)+1)])
-                value = np.concatenate([value]*repeats)[:n]
-                _df = pd.DataFrame()
-                _df['value'] = value
-                _df['type'] = 'ts'
-            else:
-                _df = pd.DataFrame()
-                omega = float(se['omega'])
-                phi = float(se['phi'])
-                _df['value'] = np.cos(seconds*omega + phi) * 0.5 + 0.5
-                _df['type'] = 'compute'
-
-            _df['name'] = name
-            _df['seconds'] = seconds
-            dfs.append(_df)
-        df = pd.concat(dfs)
-        print(df)
-
-        mat = df['value'].to_numpy().reshape((len(df) // n, n))
-        corrcoef = np.corrcoef(mat)
-        names = df1['name']
-        df_corr = pd.DataFrame(np.abs(corrcoef), columns=names)
-        df_corr.index = names
-
-        print(df_corr)
-
-        return df, df_corr
+        key = self.cache.make_key(
+            'merged', txt, body_length, self.get_store().version)
+
+        def compile():
+            _, spec = self.compile_txt(txt)
+            n = int(body_length / spec.interval)
+            merged = MergedTimeSeries(
+                spec.names, spec.chunk(0, n), spec.from_csv, spec.interval)
+            logger.debug(
+                f'Merged time series: {merged.values.shape}, {merged.from_csv.sum()} from library')
+            return merged
+
+        return self.cache.get_or_compute(key, compile)
 
 
 # %% ---- 2024-06-04 ------------------------
@@ -0,0 +1,148 @@
+"""
+File: status_stream.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Broadcast the display status to the browsers
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import json
+import time
+import queue
+
+from threading import Thread, Lock
+from websockets.sync.client import connect
+
+from . import logger
+from .protocol import encode_message, decode_message
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+class StatusBroadcaster(object):
+    '''
+    The single status subscription to the display, shared by every browser.
+
+    The display pushes the status deltas at most max_rate times per second.
+    Every browser gets the full status on subscribe, and the deltas afterwards.
+    The slow browser drops its oldest deltas, the display is never blocked.
+    '''
+    url = 'ws://localhost:23335'
+    max_size = 300000000
+    max_rate = 10  # Updates per second
+    queue_size = 100  # Deltas per browser
+    reconnect_delay = 1  # Seconds
+
+    def __init__(self, url: str = None, max_rate: float = None, clock=None):
+        if url:
+            self.url = url
+        if max_rate:
+            self.max_rate = max_rate
+        # The ClockSync annotates the deltas with the server time
+        self.clock = clock
+        self.status = dict(connected=False)
+        self.subscribers = []
+        self.lock = Lock()
+        self.thread = None
+
+    def _publish(self, delta: dict):
+        with self.lock:
+            # The eventBuffers are not the status, they are only forwarded
+            self.status.update(
+                {k: v for k, v in delta.items() if k != 'eventBuffers'})
+            subscribers = list(self.subscribers)
+
+        for q in subscribers:
+            while True:
+                try:
+                    q.put_nowait(delta)
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _run(self):
+        while True:
+            try:
+                with connect(self.url, max_size=self.max_size) as websocket:
+                    websocket.send(encode_message(
+                        dict(task_name='subscribeStatus', max_rate=self.max_rate)))
+                    decode_message(websocket.recv())
+                    logger.debug(f'Subscribed status of {self.url}')
+                    self._publish(dict(connected=True))
+                    for message in websocket:
+                        delta, _, _ = decode_message(message)
+                        if self.clock is not None:
+                            self.clock.annotate(delta)
+                        self._publish(delta)
+            except Exception as error:
+                logger.warning(f'Lost status of {self.url}: {error}')
+
+            self._publish(dict(connected=False))
+            time.sleep(self.reconnect_delay)
+
+    def subscribe(self) -> queue.Queue:
+        '''
+        Subscribe the status.
+
+        Returns:
+            - q: The queue of the deltas, the first one is the full status.
+        '''
+        q = queue.Queue(self.queue_size)
+        with self.lock:
+            q.put_nowait(dict(self.status))
+            self.subscribers.append(q)
+            if self.thread is None:
+                self.thread = Thread(target=self._run, daemon=True)
+                self.thread.start()
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self.lock:
+            if q in self.subscribers:
+                self.subscribers.remove(q)
+
+    def stream(self, keepalive: float = 15):
+        '''
+        Yield the Server-Sent Events of the status.
+
+        Args:
+            - keepalive: Seconds between the comments when nothing changes.
+        '''
+        q = self.subscribe()
+        try:
+            while True:
+                try:
+                    delta = q.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'data: {json.dumps(delta)}\n\n'
+        finally:
+            self.unsubscribe(q)
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
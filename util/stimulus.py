@@ -0,0 +1,187 @@
+"""
+File: stimulus.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Compile the SSVEP stimulus into frame-ready lookup tables
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import numpy as np
+
+from .correlation import PatchCorrelation
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def float2gray(values: np.ndarray) -> np.ndarray:
+    '''
+    Convert the float values in [0, 1] into the uint8 gray levels.
+    It matches the legacy int(x*255) conversion.
+    '''
+    return (np.clip(values, 0, 1) * 255).astype(np.uint8)
+
+
+class MergedTimeSeries(object):
+    '''
+    The wide (n_samples, n_patches) float32 time series of the trial body.
+    The columns follow the order of the patches in the design.
+    '''
+    interval = 0.01  # Seconds
+
+    def __init__(self, names: list, values: np.ndarray, from_csv: np.ndarray, interval: float = None):
+        if interval:
+            self.interval = interval
+        self.names = list(names)
+        self.values = values
+        self.from_csv = from_csv
+
+    def screen(self, top_k: int = 5, dense: bool = None):
+        '''
+        Screen the crosstalk between the patches,
+        see PatchCorrelation.run for the outputs.
+        '''
+        return PatchCorrelation(self.values, self.names).run(top_k, dense)
+
+
+class StimulusSpec(object):
+    '''
+    The compact generator of the stimulus values of the patches.
+
+    The computed patches keep their (omega, phi),
+    the library patches keep one loop of their columns as the (loop_length, n_library_patches) float32.
+    The values are produced in chunks by modular indexing,
+    so nothing the size of the trial is materialized.
+    '''
+    interval = 0.01  # Seconds
+
+    def __init__(self, names: list, omega: np.ndarray, phi: np.ndarray, from_csv: np.ndarray, loops: np.ndarray, interval: float = None):
+        if interval:
+            self.interval = interval
+        self.names = list(names)
+        self.omega = np.asarray(omega, dtype=np.float64)
+        self.phi = np.asarray(phi, dtype=np.float64)
+        self.from_csv = np.asarray(from_csv, dtype=bool)
+        self.loops = np.asarray(loops, dtype=np.float32)
+        self._omega = self.omega[~self.from_csv]
+        self._phi = self.phi[~self.from_csv]
+
+    @classmethod
+    def from_design(cls, design, library, interval: float = 0.01):
+        '''
+        The patch named as a column of the library (TimeSeriesStore) loops the column,
+        the others are computed as cos(omega * t + phi) * 0.5 + 0.5.
+        The design is the structured array or the DataFrame.
+        '''
+        names = np.asarray(design['name'])
+        from_csv = np.isin(names, library.columns)
+        if from_csv.any():
+            loops = library.take(names[from_csv])
+        else:
+            loops = np.zeros((1, 0), dtype=np.float32)
+        return cls(
+            names, np.asarray(design['omega']), np.asarray(design['phi']), from_csv, loops, interval)
+
+    def chunk(self, start: int, count: int, interval: float = None) -> np.ndarray:
+        '''
+        The (count, n_patches) values of the samples since the start.
+
+        The samples are spaced by the interval, it is the interval of the spec by default.
+        The other interval, e.g. the refresh interval, computes the cosines at the exact sample times,
+        and takes the library samples not earlier than them.
+        '''
+        idx = np.arange(start, start + count)
+        values = np.empty((count, len(self.names)), dtype=np.float32)
+
+        # Compute all the cosines in one broadcast
+        t = idx * (interval or self.interval)
+        values[:, ~self.from_csv] = np.cos(
+            t[:, None] * self._omega[None, :] + self._phi[None, :]) * 0.5 + 0.5
+
+        # Loop all the library columns in one go
+        if self.from_csv.any():
+            if interval and interval != self.interval:
+                idx = np.ceil(t / self.interval - 1e-6).astype(np.int64)
+            values[:, self.from_csv] = self.loops[idx % len(self.loops)]
+
+        return values
+
+
+class LuminanceTable(object):
+    '''
+    The dense (n_samples, n_patches) uint8 gray levels of the trial body.
+
+    The samples are evenly spaced by the interval,
+    so the sample of the time t is fetched by O(1) indexing.
+    '''
+    interval = 0.01  # Seconds
+
+    def __init__(self, table: np.ndarray, names: list, interval: float = None):
+        if interval:
+            self.interval = interval
+        self.table = np.ascontiguousarray(table, dtype=np.uint8)
+        self.names = list(names)
+        self.n_samples, self.n_patches = self.table.shape
+
+    def index(self, t: float) -> int:
+        '''
+        The index of the first sample not earlier than t,
+        it is clipped into the table.
+        '''
+        j = int(np.ceil(t / self.interval - 1e-6))
+        return min(max(j, 0), self.n_samples - 1)
+
+    def row(self, t: float) -> np.ndarray:
+        '''The gray levels of the patches at the time t'''
+        return self.table[self.index(t)]
+
+
+class StreamingLuminance(LuminanceTable):
+    '''
+    The gray levels of the trial body generated from the StimulusSpec.
+    Only the chunk around the current sample is kept in memory.
+    '''
+    chunk_size = 256  # Samples
+
+    def __init__(self, spec: StimulusSpec, n_samples: int, chunk_size: int = None, interval: float = None):
+        if chunk_size:
+            self.chunk_size = chunk_size
+        self.spec = spec
+        self.interval = interval or spec.interval
+        self.names = spec.names
+        self.n_samples = n_samples
+        self.n_patches = len(spec.names)
+        self.start = 0
+        self.table = np.zeros((0, self.n_patches), dtype=np.uint8)
+
+    def row(self, t: float) -> np.ndarray:
+        j = self.index(t)
+        if not self.start <= j < self.start + len(self.table):
+            count = min(self.chunk_size, self.n_samples - j)
+            self.table = float2gray(
+                self.spec.chunk(j, count, self.interval))
+            self.start = j
+        return self.table[j - self.start]
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
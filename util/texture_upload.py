@@ -0,0 +1,162 @@
+"""
+File: texture_upload.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Upload only the changed regions of the full screen texture
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import numpy as np
+
+from . import logger
+
+try:
+    from pyglet import gl as GL
+except ImportError:
+    GL = None
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+def patch_rects(patches_xy: list, size: tuple) -> np.ndarray:
+    '''
+    The pixel bounding rectangles of the patches.
+
+    Returns:
+        - rects: The (n, 4) int array of [left, top, right, bottom], clipped to the screen.
+    '''
+    width, height = size
+    xy = np.array(patches_xy, dtype=np.float64).reshape(-1, 4)
+    rects = np.stack([
+        np.floor(xy[:, 0]), np.floor(xy[:, 1]),
+        np.ceil(xy[:, 2]) + 1, np.ceil(xy[:, 3]) + 1], axis=1)
+    rects = np.clip(rects, 0, [width, height, width, height])
+    return rects.astype(np.int64)
+
+
+class TextureUploader(object):
+    '''
+    The uploader of the ImageStim texture.
+
+    The frame without the changed patches is not uploaded.
+    The bounding rectangles of the changed patches are uploaded by glTexSubImage2D,
+    the whole image is uploaded when the rectangles cover most of it,
+    or when the texture is not the plain copy of the image (then the sub-upload is disabled).
+    The stats count the uploaded bytes against the whole image uploads.
+    '''
+    full_ratio = 0.5  # The changed area above it uploads the whole image
+
+    def __init__(self, stim, img, patches_xy: list):
+        self.stim = stim
+        self.img = img
+        self.size = img.size
+        self.rects = patch_rects(patches_xy, self.size)
+        self.areas = (self.rects[:, 2] - self.rects[:, 0]) * \
+            (self.rects[:, 3] - self.rects[:, 1])
+        self.channels = len(img.getbands())
+        self.full_bytes = self.size[0] * self.size[1] * self.channels
+        self.enabled = GL is not None
+        self.checked = False
+        self.stats = dict(frames=0, skipped=0, partial=0, full=0,
+                          uploadedBytes=0, fullBytes=0)
+
+    def _check_texture(self) -> bool:
+        '''The texture has to be the same size as the image'''
+        try:
+            tex_id = self.stim._texID
+            GL.glBindTexture(GL.GL_TEXTURE_2D, tex_id)
+            w, h = GL.GLint(), GL.GLint()
+            GL.glGetTexLevelParameteriv(
+                GL.GL_TEXTURE_2D, 0, GL.GL_TEXTURE_WIDTH, w)
+            GL.glGetTexLevelParameteriv(
+                GL.GL_TEXTURE_2D, 0, GL.GL_TEXTURE_HEIGHT, h)
+            if (w.value, h.value) != self.size:
+                logger.warning(
+                    f'Disabled sub-texture upload, texture {(w.value, h.value)} != image {self.size}')
+                return False
+            return True
+        except Exception as error:
+            logger.warning(f'Disabled sub-texture upload: {error}')
+            return False
+
+    def _sub_upload(self, rects: np.ndarray):
+        width, height = self.size
+        fmt = GL.GL_RGBA if self.channels == 4 else GL.GL_RGB
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.stim._texID)
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1)
+        for left, top, right, bottom in rects.tolist():
+            # The texture rows are bottom up
+            data = np.ascontiguousarray(
+                np.asarray(self.img.crop((left, top, right, bottom)))[::-1])
+            GL.glTexSubImage2D(
+                GL.GL_TEXTURE_2D, 0, left, height - bottom, right - left, bottom - top,
+                fmt, GL.GL_UNSIGNED_BYTE, data.ctypes.data)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+
+    def upload(self, changed: np.ndarray = None):
+        '''
+        Upload the changed patches.
+
+        Args:
+            - changed: The indices of the changed patches, None for the whole image.
+        '''
+        stats = self.stats
+        stats['frames'] += 1
+        stats['fullBytes'] += self.full_bytes
+
+        if changed is not None and len(changed) == 0:
+            stats['skipped'] += 1
+            return
+
+        if changed is not None and self.enabled and \
+                self.areas[changed].sum() * self.channels < self.full_ratio * self.full_bytes:
+            if not self.checked:
+                self.enabled = self._check_texture()
+                self.checked = True
+
+        if changed is not None and self.enabled and \
+                self.areas[changed].sum() * self.channels < self.full_ratio * self.full_bytes:
+            try:
+                self._sub_upload(self.rects[changed])
+                stats['partial'] += 1
+                stats['uploadedBytes'] += int(
+                    self.areas[changed].sum()) * self.channels
+                return
+            except Exception as error:
+                logger.warning(f'Disabled sub-texture upload: {error}')
+                self.enabled = False
+
+        self.stim.image = self.img
+        stats['full'] += 1
+        stats['uploadedBytes'] += self.full_bytes
+
+    def summary(self) -> dict:
+        stats = self.stats
+        return dict(
+            stats,
+            savedRatio=round(
+                1 - stats['uploadedBytes'] / stats['fullBytes'], 4) if stats['fullBytes'] else 0)
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
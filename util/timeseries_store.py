@@ -0,0 +1,174 @@
+"""
+File: timeseries_store.py
+Author: Chuncheng Zhang
+Date: 2026-10-18
+Copyright & Email: chuncheng.zhang@ia.ac.cn
+
+Purpose:
+    Columnar binary store of the time series libraries
+
+Functions:
+    1. Requirements and constants
+    2. Function and class
+    3. Play ground
+    4. Pending
+    5. Pending
+"""
+
+
+# %% ---- 2026-10-18 ------------------------
+# Requirements and constants
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+from threading import RLock
+
+from . import logger
+
+
+# %% ---- 2026-10-18 ------------------------
+# Function and class
+class TimeSeriesStore(object):
+    '''
+    The binary copy of the time series library <name>.csv.
+
+    The values are saved as the (n_channels, n_samples) float32 array in <name>.npy,
+    every channel is contiguous in the memory-mapped file.
+    The header <name>.json holds the columns, the sampling interval,
+    and the signature of the source CSV.
+    The store is converted from the CSV on first use and whenever the CSV changes,
+    except the generated store, its values are not from the CSV and it is never reconverted.
+    '''
+    interval = 0.01  # Seconds, the default sampling interval of the CSV
+
+    def __init__(self, root: Path, name: str = 'ts'):
+        self.root = root
+        self.name = name
+        self.csv_path = root.joinpath(f'{name}.csv')
+        self.npy_path = root.joinpath(f'{name}.npy')
+        self.header_path = root.joinpath(f'{name}.json')
+        self.lock = RLock()
+        self.header = None
+        self.values = None
+        self.key = None
+
+    @staticmethod
+    def _signature(path: Path):
+        try:
+            st = path.stat()
+            return [st.st_mtime_ns, st.st_size]
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def write(cls, root: Path, name: str, values: np.ndarray, columns: list, interval: float = None, generated: bool = False, **extra):
+        '''
+        Write the (n_channels, n_samples) values into the store.
+        The extra items are kept in the header.
+
+        Args:
+            - generated: The values are not from the CSV, the source is None and the CSV is ignored.
+        '''
+        values = np.ascontiguousarray(values, dtype=np.float32)
+        assert values.ndim == 2 and len(values) == len(columns), \
+            f'Invalid values {values.shape} for {len(columns)} columns'
+
+        npy_path = root.joinpath(f'{name}.npy')
+        header_path = root.joinpath(f'{name}.json')
+
+        tmp = npy_path.with_suffix('.npy.tmp')
+        with open(tmp, 'wb') as f:
+            np.save(f, values)
+        os.replace(tmp, npy_path)
+
+        header = dict(
+            extra,
+            columns=list(columns),
+            interval=interval or cls.interval,
+            shape=list(values.shape),
+            generated=generated,
+            source=None if generated else cls._signature(
+                root.joinpath(f'{name}.csv')),
+            npy=cls._signature(npy_path))
+
+        tmp = header_path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps(header))
+        os.replace(tmp, header_path)
+
+        logger.debug(f'Wrote time series store {npy_path}: {values.shape}')
+        return header
+
+    def convert(self):
+        '''Convert the CSV into the store'''
+        df = pd.read_csv(self.csv_path, index_col=0)
+        return self.write(
+            self.root, self.name, df.to_numpy(dtype=np.float32).T, df.columns.to_list(), self.interval)
+
+    def open(self):
+        '''
+        Open the memory-mapped store,
+        it is converted or reopened if the files are changed.
+        '''
+        with self.lock:
+            header = None
+            if self.header_path.is_file():
+                header = json.loads(self.header_path.read_text())
+
+            # The generated store keeps its values whatever the CSV is
+            source = self._signature(self.csv_path)
+            generated = header is not None and header.get('generated')
+            if source is not None and not generated and (header is None or header.get('source') != source):
+                logger.debug(f'Converting {self.csv_path}')
+                # Release the mapped file before it is replaced
+                self.values = None
+                self.key = None
+                header = self.convert()
+
+            if header is None:
+                raise FileNotFoundError(f'No time series library: {self.name}')
+
+            key = (tuple(header['npy']), header['source'] and tuple(header['source']))
+            if key != self.key:
+                self.values = np.load(self.npy_path, mmap_mode='r')
+                self.header = header
+                self.key = key
+                self.index = {e: i for i, e in enumerate(header['columns'])}
+                logger.debug(
+                    f'Opened time series store {self.npy_path}: {self.values.shape}')
+
+            return self
+
+    @property
+    def columns(self) -> list:
+        return self.header['columns']
+
+    @property
+    def version(self) -> str:
+        '''The version changes whenever the store is rewritten'''
+        return f'{self.name}:{self.key}'
+
+    def column(self, name: str) -> np.ndarray:
+        '''The memory-mapped samples of the column'''
+        return self.values[self.index[name]]
+
+    def take(self, names: list) -> np.ndarray:
+        '''The (n_samples, n_columns) samples of the columns'''
+        return self.values[[self.index[e] for e in names]].T
+
+    def to_df(self) -> pd.DataFrame:
+        return pd.DataFrame(np.array(self.values).T, columns=self.columns)
+
+
+# %% ---- 2026-10-18 ------------------------
+# Play ground
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
+
+
+# %% ---- 2026-10-18 ------------------------
+# Pending
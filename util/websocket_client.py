@@ -18,24 +18,144 @@ Functions:
 
 # %% ---- 2024-06-06 ------------------------
 # Requirements and constants
+import time
+import queue
+import itertools
+
+from threading import Thread, BoundedSemaphore
 from websockets.sync.client import connect
+from websockets.exceptions import ConnectionClosed
 
 from . import logger
+from .protocol import pack_envelope, unpack_envelope
 
 
 # %% ---- 2024-06-06 ------------------------
 # Function and class
 
 class MyWebsocketClient(object):
+    '''
+    The pool of long-lived websocket connections to the display.
+
+    The Flask threads share the pool, every request borrows one connection.
+    The request is wrapped with its id, and the response with the same id is waited.
+    The idle connections are pinged by the heartbeat thread.
+    '''
     url = 'ws://localhost:23335'
+    max_size = 300000000
+    pool_size = 4  # Connections
+    timeout = 10  # Seconds waiting for the response
+    heartbeat_interval = 5  # Seconds
+    reconnect_delays = (0.05, 0.1, 0.2)  # Seconds before the retries
+
+    def __init__(self, url: str = None, pool_size: int = None):
+        if url:
+            self.url = url
+        if pool_size:
+            self.pool_size = pool_size
+        self.idle = queue.LifoQueue()
+        self.slots = BoundedSemaphore(self.pool_size)
+        self.rids = itertools.count(1)
+        Thread(target=self._heartbeat, daemon=True).start()
+
+    def _connect(self):
+        '''Connect to the display, retry with backoff'''
+        for delay in self.reconnect_delays + (None,):
+            try:
+                websocket = connect(self.url, max_size=self.max_size)
+                logger.debug(f'Connected to {self.url}')
+                return websocket
+            except (OSError, TimeoutError) as error:
+                if delay is None:
+                    raise
+                logger.warning(
+                    f'Failed to connect {self.url}: {error}, retry in {delay} seconds')
+                time.sleep(delay)
+
+    def _acquire(self):
+        self.slots.acquire()
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            return self._connect()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def _release(self, websocket, broken: bool = False):
+        if broken:
+            websocket.close()
+        else:
+            self.idle.put(websocket)
+        self.slots.release()
 
     def send(self, pkg):
-        with connect(self.url, max_size=300000000) as websocket:
-            websocket.send(pkg)
-            logger.debug(f'Sent {pkg[:20]} ({len(pkg)} bytes)')
-            received = websocket.recv()
-            logger.debug(f'Received {received[:20]} ({len(pkg)} bytes)')
-            return received
+        '''
+        Send the pkg and return the response.
+        The stale connection is replaced if the pkg is not sent yet.
+        '''
+        rid = next(self.rids)
+        for retry in [True, False]:
+            websocket = self._acquire()
+            sent = False
+            try:
+                websocket.send(pack_envelope(rid, pkg))
+                sent = True
+                logger.debug(f'Sent {pkg[:20]} ({len(pkg)} bytes)')
+
+                while True:
+                    got, received = unpack_envelope(
+                        websocket.recv(timeout=self.timeout))
+                    if got == rid:
+                        break
+                    logger.warning(f'Dropped the response of {got}, expect {rid}')
+
+                received = bytes(received)
+                logger.debug(
+                    f'Received {received[:20]} ({len(received)} bytes)')
+                self._release(websocket)
+                return received
+
+            except ConnectionClosed:
+                self._release(websocket, broken=True)
+                if sent or not retry:
+                    raise
+                logger.debug('Replaced the closed connection')
+
+            except BaseException:
+                self._release(websocket, broken=True)
+                raise
+
+    def _heartbeat(self):
+        '''Ping the idle connections, the dead ones are dropped'''
+        while True:
+            time.sleep(self.heartbeat_interval)
+
+            alive = []
+            while True:
+                try:
+                    websocket = self.idle.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    if websocket.ping().wait(self.timeout):
+                        alive.append(websocket)
+                        continue
+                except Exception:
+                    pass
+
+                logger.warning(f'Dropped the dead connection to {self.url}')
+                websocket.close()
+
+            for websocket in alive:
+                if self.idle.qsize() < self.pool_size:
+                    self.idle.put(websocket)
+                else:
+                    websocket.close()
 
 
 # %% ---- 2024-06-06 ------------------------
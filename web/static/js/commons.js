@@ -13,54 +13,79 @@
     }
 }
 
-let statusDiv = document.getElementById('divDisplayStatus')
-
-function checkoutDisplayStatus() {
-    d3.json('/checkoutDisplayStatus').then(raw => {
-        console.log(raw)
-        let rows = []
-        for (const key in raw) {
-            switch (key) {
-                case 'passed': {
-                    rows.push(`${key}: ${parseFloat(raw[key]).toFixed(2)}`)
-                    break
-                }
-
-                case 'remain': {
-                    rows.push(`${key}: ${parseFloat(raw[key]).toFixed(2)}`)
-                    break
-                }
-
-                case 'eventBuffer': {
-                    // Got event buffer, place it into the textarea and join it to #divExperimentEvents
-                    if (raw[key] !== '') {
-                        let div = d3.select('#divExperimentEvents').append('div').attr('style', 'max-height: 400px'),
-                            ol = div.append('ol').attr('style', 'max-height: 380px; overflow-y: auto');
-
-                        ol.selectAll('li').data(raw[key].split('\n')).enter().append('li').text(d => d)
-
-                        // let ta = document.createElement('textarea')
-                        // Object.assign(ta.style, { 'width': '400px', 'height': '400px' })
-                        // ta.value = raw[key]
-                        // document.getElementById('divExperimentEvents').appendChild(ta)
-                    }
-                    break
-                }
-
-                default: {
-                    rows.push(`${key}: ${raw[key]}`)
-                }
-            }
+let statusDiv = document.getElementById('divDisplayStatus'),
+    displayStatus = {};
 
+/**
+ * Format the status item
+ * @param {string} key
+ * @param {*} value
+ * @returns The text of the item
+ */
+function formatStatus(key, value) {
+    switch (key) {
+        case 'passed':
+        case 'remain': {
+            return `${key}: ${parseFloat(value).toFixed(2)}`
         }
-        statusDiv.innerHTML = ''
-        d3.select(statusDiv).selectAll('p').data(rows).enter().append('p').text(d => d)
-    }).catch(err => {
-        statusDiv.innerHTML = ''
-        d3.select(statusDiv).selectAll('p').data(['Display is disconnected!!!']).enter().append('p').text(d => d)
 
-        console.error(err)
-    })
+        case 'textureUpload': {
+            if (!value) return `${key}: N.A.`
+            return `${key}: ${(value.savedRatio * 100).toFixed(1)}% saved, ${value.skipped} skipped, ${value.partial} partial, ${value.full} full of ${value.frames} frames`
+        }
+
+        case 'frameProfile': {
+            let ms = value.intervalMs
+            return `${key}: trial ${value.trial}, ${value.frames} frames, interval p50/p95/p99/max ${ms.p50}/${ms.p95}/${ms.p99}/${ms.max} ms, ${value.dropped} dropped`
+        }
+
+        default: {
+            return `${key}: ${value}`
+        }
+    }
+}
+
+/**
+ * Place the event buffer of the finished task into #divExperimentEvents
+ * @param {string} eventBuffer
+ */
+function appendEventBuffer(eventBuffer) {
+    if (eventBuffer === '') {
+        return
+    }
+
+    let div = d3.select('#divExperimentEvents').append('div').attr('style', 'max-height: 400px'),
+        ol = div.append('ol').attr('style', 'max-height: 380px; overflow-y: auto');
+
+    ol.selectAll('li').data(eventBuffer.split('\n')).enter().append('li').text(d => d)
 }
 
-setInterval(() => { checkoutDisplayStatus() }, 1000)
\ No newline at end of file
+/**
+ * Merge the delta into the status, only the changed items are updated
+ * @param {object} delta
+ */
+function updateDisplayStatus(delta) {
+    (delta.eventBuffers || []).forEach(appendEventBuffer)
+    delete delta.eventBuffers
+
+    Object.assign(displayStatus, delta)
+
+    let rows = displayStatus.connected === false ? [['connected', 'Display is disconnected!!!']] : Object.entries(displayStatus)
+
+    d3.select(statusDiv).selectAll('p').data(rows, d => d[0]).join('p')
+        .text(d => d[0] === 'connected' && d[1] !== true ? d[1] : formatStatus(d[0], d[1]))
+}
+
+// The display pushes the status deltas, the browser reconnects automatically
+{
+    let source = new EventSource('/displayStatusStream');
+
+    source.onmessage = (e) => {
+        updateDisplayStatus(JSON.parse(e.data))
+    }
+
+    source.onerror = (err) => {
+        updateDisplayStatus({ connected: false })
+        console.error(err)
+    }
+}
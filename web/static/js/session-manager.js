@@ -58,6 +58,55 @@ updateSavedSessions()
     });
 }
 
+/**
+ * Collect the block from the inputs, the fields are the /go form
+ * @returns The block
+ */
+function collectBlock() {
+    return Object.assign({}, {
+        designText: designTextDom.value,
+        resolutionX: document.getElementById("inputMonitorResolutionX").value,
+        resolutionY: document.getElementById("inputMonitorResolutionY").value,
+        trialBodyLength: document.getElementById('inputTrialBodyLength').value,
+        trialHeadLength: document.getElementById("inputTrialHeadLength").value,
+        trialTailLength: document.getElementById("inputTrialTailLength").value,
+        trialRepeats: document.getElementById("inputTrialRepeats").value,
+        cue: document.getElementById('selectCue').value,
+        backgroundImageDataUrl: getBackgroundImageDataUrl(),
+        patchShape: layoutOptions.selectPatchShape,
+        renderMode: document.getElementById('selectRenderMode').value
+    });
+}
+
+/**
+ * Post the task and alert the error
+ * @param {string} url
+ * @param {object} options The fetch options
+ * @returns The promise of the response body
+ */
+function postTask(url, options) {
+    return fetch(url, Object.assign({ method: "POST" }, options)).then((response) => {
+        if (!response.ok) {
+            response.json().then((body) => {
+                let msg = [response.status, response.statusText]
+                for (let key in body) {
+                    msg.push(`${key}, ${body[key]}`)
+                }
+                alert(msg.join('\n\n'))
+            })
+            throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        return response.json(); // or response.text() or whatever the server sends
+    }).then((body) => {
+        // handle body
+        console.log(body)
+        return body
+    }).catch((error) => {
+        // handle error
+        console.error(error)
+    });
+}
+
 // Take over Go button
 {
     let goBtn = document.getElementById("inputGoButton");
@@ -65,43 +114,55 @@ updateSavedSessions()
 
     goBtn.onclick = () => {
 
-        let pkg = Object.assign({}, {
-            designText: designTextDom.value,
-            resolutionX: document.getElementById("inputMonitorResolutionX").value,
-            resolutionY: document.getElementById("inputMonitorResolutionY").value,
-            trialBodyLength: document.getElementById('inputTrialBodyLength').value,
-            trialHeadLength: document.getElementById("inputTrialHeadLength").value,
-            trialTailLength: document.getElementById("inputTrialTailLength").value,
-            trialRepeats: document.getElementById("inputTrialRepeats").value,
-            cue: document.getElementById('selectCue').value,
-            backgroundImageDataUrl: getBackgroundImageDataUrl(),
-            patchShape: layoutOptions.selectPatchShape
-        });
+        let pkg = collectBlock();
 
         console.log(pkg)
 
-        fetch('/go', {
-            method: "POST",
+        postTask('/go', {
             body: new URLSearchParams(pkg) // event.target is the form
-        }).then((response) => {
-            if (!response.ok) {
-                response.json().then((body) => {
-                    let msg = [response.status, response.statusText]
-                    for (let key in body) {
-                        msg.push(`${key}, ${body[key]}`)
-                    }
-                    alert(msg.join('\n\n'))
-                })
-                throw new Error(`HTTP error! Status: ${response.status}`);
-            }
-            return response.json(); // or response.text() or whatever the server sends
-        }).then((body) => {
-            // handle body
-            console.log(body)
-        }).catch((error) => {
-            // handle error
-            console.error(error)
-        });
+        })
+
+    }
+}
+
+// Take over the batch buttons, the blocks are queued in one request
+{
+    let addBtn = document.getElementById("inputAddToBatchButton"),
+        goBatchBtn = document.getElementById("inputGoBatchButton"),
+        clearBtn = document.getElementById("inputClearBatchButton"),
+        batchSpan = document.getElementById("spanBatchBlocks"),
+        batch = [];
+
+    let updateBatch = () => {
+        batchSpan.textContent = `${batch.length} blocks`
+    }
 
+    addBtn.onclick = () => {
+        batch.push(collectBlock())
+        updateBatch()
     }
-}
\ No newline at end of file
+
+    clearBtn.onclick = () => {
+        batch = []
+        updateBatch()
+    }
+
+    goBatchBtn.onclick = () => {
+        if (batch.length === 0) {
+            alert('Add the blocks to the batch first')
+            return
+        }
+
+        postTask('/goBatch', {
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ blocks: batch })
+        }).then((body) => {
+            if (body) {
+                batch = []
+                updateBatch()
+            }
+        })
+    }
+
+    updateBatch()
+}
@@ -0,0 +1,116 @@
+/**
+ * Draw the decimated time series and the correlation of the patches.
+ * The payload is built by util/preview.py and fetched from /preview/<key>
+ */
+let previewDiv = document.getElementById('divTimeSeriesPreview'),
+    corrDiv = document.getElementById('divCorrPreview');
+
+/**
+ * Decode the base64 string into the typed array
+ * @param {string} s
+ * @param {*} ArrayType
+ * @returns The typed array
+ */
+function decodeBase64(s, ArrayType) {
+    let raw = atob(s),
+        bytes = new Uint8Array(raw.length);
+    for (let i = 0; i < raw.length; i++) {
+        bytes[i] = raw.charCodeAt(i)
+    }
+    return new ArrayType(bytes.buffer)
+}
+
+/**
+ * Draw the min/max band of every patch, faceted by the type
+ * @param {object} payload
+ */
+function drawTimeSeries(payload) {
+    let starts = decodeBase64(payload.starts, Uint32Array),
+        lo = decodeBase64(payload.lo, Uint8Array),
+        hi = decodeBase64(payload.hi, Uint8Array),
+        m = starts.length,
+        width = 800,
+        height = 240,
+        margin = { top: 20, right: 20, bottom: 30, left: 40 },
+        x = d3.scaleLinear().domain([0, payload.nSamples * payload.interval]).range([margin.left, width - margin.right]),
+        y = d3.scaleLinear().domain([0, 255]).range([height - margin.bottom, margin.top]),
+        color = d3.scaleOrdinal(d3.schemeTableau10);
+
+    ['ts', 'compute'].forEach(type => {
+        let patches = payload.names.map((name, i) => ({ name, i })).filter(d => payload.types[d.i] === type)
+
+        if (patches.length === 0) {
+            return
+        }
+
+        let svg = d3.select(previewDiv).append('svg').attr('width', width).attr('height', height)
+
+        svg.append('g').attr('transform', `translate(0,${height - margin.bottom})`).call(d3.axisBottom(x))
+        svg.append('g').attr('transform', `translate(${margin.left},0)`).call(d3.axisLeft(y).ticks(5))
+        svg.append('text').attr('x', margin.left).attr('y', margin.top - 5).text(type)
+
+        let index = d3.range(m),
+            area = (i) => d3.area()
+                .x(j => x(starts[j] * payload.interval))
+                .y0(j => y(lo[i * m + j]))
+                .y1(j => y(hi[i * m + j]))(index);
+
+        svg.selectAll('path.patch').data(patches).enter().append('path')
+            .attr('class', 'patch')
+            .attr('fill', d => color(d.name))
+            .attr('stroke', d => color(d.name))
+            .attr('fill-opacity', 0.5)
+            .attr('d', d => area(d.i))
+            .append('title').text(d => d.name)
+    })
+}
+
+/**
+ * Draw the dense correlation as the heatmap, or the top-k pairs as the table
+ * @param {object} payload
+ */
+function drawCorr(payload) {
+    let n = payload.names.length
+
+    if (payload.corr) {
+        let corr = decodeBase64(payload.corr, Uint8Array),
+            size = 400,
+            canvas = d3.select(corrDiv).append('canvas').attr('width', n).attr('height', n)
+                .attr('style', `width: ${size}px; height: ${size}px; image-rendering: pixelated`).node(),
+            ctx = canvas.getContext('2d'),
+            img = ctx.createImageData(n, n);
+
+        corr.forEach((v, k) => {
+            let c = d3.rgb(d3.interpolateViridis(v / 255))
+            img.data.set([c.r, c.g, c.b, 255], k * 4)
+        })
+        ctx.putImageData(img, 0, 0)
+
+        canvas.onmousemove = (e) => {
+            let i = parseInt(e.offsetY / size * n),
+                j = parseInt(e.offsetX / size * n);
+            if (i < n && j < n) {
+                canvas.title = `${payload.names[i]}, ${payload.names[j]}: ${(corr[i * n + j] / 255).toFixed(2)}`
+            }
+        }
+        return
+    }
+
+    let pairs = payload.pairs,
+        rows = d3.range(pairs.corr.length).sort((a, b) => pairs.corr[b] - pairs.corr[a]).slice(0, 100),
+        table = d3.select(corrDiv).append('table');
+
+    table.append('tr').selectAll('th').data(['name', 'other', 'corr', 'spectral']).enter().append('th').text(d => d)
+    table.selectAll('tr.pair').data(rows).enter().append('tr').attr('class', 'pair')
+        .selectAll('td')
+        .data(k => [payload.names[pairs.name[k]], payload.names[pairs.other[k]], pairs.corr[k], pairs.spectral[k]])
+        .enter().append('td').text(d => d)
+}
+
+d3.json(`/preview/${previewDiv.getAttribute('previewKey')}`).then(payload => {
+    drawTimeSeries(payload)
+    drawCorr(payload)
+}).catch(err => {
+    d3.select(previewDiv).append('p').text('Failed to load the preview')
+    console.error(err)
+})